@@ -0,0 +1,89 @@
+"""비교 그림 생성 시간 / 전송 크기 벤치마크: 이전 빌더(baseline) vs viz_rate (가짜 시트 데이터)
+
+이전 빌더(viz_rate_week / viz_rate_month)는 git 기록에서 바꾸기 직전의 modules/plotting.py 를 읽어 씀
+저장소 루트(git 작업 폴더)에서 실행:
+    python benchmarks/bench_figures.py
+    DASHBOARD_COMPACT_FIGURES=0 python benchmarks/bench_figures.py   # 압축 없이
+"""
+import sys
+import time
+import types
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from modules.sheets_client import DASHBOARD_WORKSHEETS, make_fake_backend
+from modules.data_loader import clean_sheet_values, load_true_range
+from modules.cube import ComparisonCube
+from modules.preprocessing import cleansing_df
+from modules.metric import cal_rate, cal_count
+from modules.plotting import viz_rate
+
+# viz_rate 로 바꾼 커밋 (이 커밋의 부모가 이전 빌더를 가진 버전)
+BASELINE_COMMIT_GREP = "Replace viz_rate_week/viz_rate_month"
+
+
+def load_baseline_plotting():
+    """viz_rate 로 바꾸기 직전의 modules/plotting.py 를 git 기록에서 읽어 모듈로 로드"""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+    commit = git("log", "-1", "--format=%H", f"--grep={BASELINE_COMMIT_GREP}", "--fixed-strings").strip()
+    if not commit:
+        raise SystemExit(f"git 기록에서 '{BASELINE_COMMIT_GREP}' 커밋을 찾지 못했습니다")
+    module = types.ModuleType("baseline_plotting")
+    exec(compile(git("show", f"{commit}^:modules/plotting.py"), "baseline_plotting.py", "exec"), module.__dict__)
+    return module
+
+
+baseline = load_baseline_plotting()
+
+
+def baseline_rate(df_year1, df_year2, panel, df_diff_count, df_diff_rate, year1, year2, true_range, week):
+    """이전 페이지와 같은 방식: 양수/음수를 나눠 주/월 빌더 호출"""
+    pos = df_diff_rate[df_diff_rate["diff_pp"] >= 0]
+    neg = df_diff_rate[df_diff_rate["diff_pp"] < 0]
+    viz = baseline.viz_rate_week if week else baseline.viz_rate_month
+    return viz(df_year1, df_year2, panel, pos, neg, df_diff_count, df_diff_rate, year1, year2, true_range)
+
+
+BUILDERS = {"before": baseline_rate, "after": viz_rate}
+
+
+def bench(worksheet, week, values, year1, year2, repeat=3):
+    """구간마다 그림을 repeat 번 만들어 가장 빠른 시간과 JSON 크기를 평균"""
+    df, panel_cos = clean_sheet_values(values, week)
+    cube = ComparisonCube(df, panel_cos)
+    true_range = load_true_range(week)
+    df_year1, df_year2 = cleansing_df(cube, year1, year2)
+    df_diff_count = cal_count(cube, year1, year2)
+
+    for label, builder in BUILDERS.items():
+        times, sizes = [], []
+        for panel in panel_cos:
+            df_diff_rate = cal_rate(cube, panel, year1, year2)
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fig = builder(
+                    df_year1, df_year2, panel, df_diff_count, df_diff_rate,
+                    year1, year2, true_range, week=week
+                )
+                best = min(best, time.perf_counter() - started)
+            times.append(best)
+            sizes.append(len(fig.to_json().encode("utf-8")))
+
+        print(
+            f"{worksheet:<28} {label:<6} traces {len(fig.data)}  "
+            f"build {sum(times) / len(times) * 1000:6.1f} ms  "
+            f"payload {sum(sizes) / len(sizes) / 1024:6.1f} KB"
+        )
+
+if __name__ == "__main__":
+    backend = make_fake_backend()
+    year2 = datetime.now().year
+    for worksheet, week in DASHBOARD_WORKSHEETS.items():
+        bench(worksheet, week, backend.sheets[worksheet], year2 - 1, year2)
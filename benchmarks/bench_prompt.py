@@ -0,0 +1,37 @@
+"""AI 보고서 프롬프트 크기 비교: df.to_string() 전체 표 vs 요약 표 (가짜 시트 데이터)
+
+저장소 루트에서 실행:
+    python benchmarks/bench_prompt.py
+    DASHBOARD_REPORT_TOKEN_BUDGET=800 python benchmarks/bench_prompt.py   # 예산을 줄였을 때
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from modules.sheets_client import DASHBOARD_WORKSHEETS, make_fake_backend
+from modules.data_loader import clean_sheet_values
+from modules.dataset_store import DatasetStore
+from modules.genai import report_prompt
+from modules.report_summary import estimate_tokens
+
+
+if __name__ == "__main__":
+    backend = make_fake_backend()
+    store = DatasetStore()
+    for worksheet, week in DASHBOARD_WORKSHEETS.items():
+        df, panel_cos = clean_sheet_values(backend.sheets[worksheet], week)
+        dataset = store.publish(worksheet, df, panel_cos, "bench")
+
+        started = time.perf_counter()
+        prompt = report_prompt(dataset)
+        elapsed = time.perf_counter() - started
+        # 앱은 전체 표 크기를 프레임 모양으로만 추정하므로 여기서 실제 df.to_string() 과 비교
+        full_tokens = prompt.tokens - prompt.data.tokens + estimate_tokens(df.to_string())
+        print(
+            f"{worksheet:<28} full ~{full_tokens:6,} tok (est {prompt.full_tokens:6,})  "
+            f"compact ~{prompt.tokens:6,} tok ({prompt.tokens / full_tokens:5.1%})  "
+            f"quarters {prompt.data.quarter_years}y recent {prompt.data.recent_periods}  "
+            f"{'fits' if prompt.data.fits else 'OVER'}  build {elapsed * 1000:5.1f} ms"
+        )
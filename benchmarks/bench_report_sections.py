@@ -0,0 +1,38 @@
+"""단계별 보고서 전체 시간: 섹션을 하나씩 vs 동시에 (가짜 클라이언트, 가짜 시트 데이터)
+
+저장소 루트에서 실행:
+    python benchmarks/bench_report_sections.py
+    python benchmarks/bench_report_sections.py 2.0 4   # 호출당 2초, 동시 4개
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from modules.sheets_client import make_fake_backend
+from modules.data_loader import clean_sheet_values
+from modules.dataset_store import DatasetStore
+from modules.genai import REPORT_SECTION_WORKERS, FakeGenAIClient, sectioned_report
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+def run(dataset, delay, workers):
+    started = time.perf_counter()
+    _, sections, _ = sectioned_report(dataset, FakeGenAIClient(delay=delay), workers=workers)
+    return time.perf_counter() - started, sections
+
+
+if __name__ == "__main__":
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else REPORT_SECTION_WORKERS
+
+    df, panel_cos = clean_sheet_values(make_fake_backend().sheets[WORKSHEET], True)
+    dataset = DatasetStore().publish(WORKSHEET, df, panel_cos, "bench")
+
+    sequential, sections = run(dataset, delay, 1)
+    parallel, _ = run(dataset, delay, workers)
+    print(f"{len(sections)} sections + summary, fake call {delay:.1f}s")
+    print(f"sequential (1 worker)    {sequential:6.2f} s")
+    print(f"parallel ({workers:>2} workers)    {parallel:6.2f} s")
@@ -0,0 +1,45 @@
+"""AI 보고서 첫 응답 시간: 한 번에 받기 vs 스트리밍 (가짜 클라이언트, 가짜 시트 데이터)
+
+저장소 루트에서 실행:
+    python benchmarks/bench_report_stream.py
+    python benchmarks/bench_report_stream.py 12 20   # 전체 응답 12초, 20조각
+"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# 벤치마크 보고서가 실제 보고서 캐시에 섞이지 않도록
+os.environ.setdefault("DASHBOARD_REPORT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_reports_"))
+
+from modules.sheets_client import make_fake_backend
+from modules.data_loader import clean_sheet_values
+from modules.dataset_store import DatasetStore
+from modules.genai import FakeGenAIClient, ReportStream, full_data_report
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+if __name__ == "__main__":
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    chunks = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    client = FakeGenAIClient(delay=delay, chunks=chunks)
+
+    df, panel_cos = clean_sheet_values(make_fake_backend().sheets[WORKSHEET], True)
+    dataset = DatasetStore().publish(WORKSHEET, df, panel_cos, "bench")
+
+    # 한 번에 받기: 전체 응답이 와야 처음 보임
+    started = time.perf_counter()
+    full_data_report(dataset, client)
+    blocking = time.perf_counter() - started
+
+    stream = ReportStream(dataset, client)
+    for _ in stream:
+        pass
+
+    print(f"fake response {delay:.1f}s in {chunks} chunks")
+    print(f"blocking   first text {blocking:6.2f} s  total {blocking:6.2f} s")
+    print(f"streaming  first text {stream.first_chunk_seconds:6.2f} s  total {stream.seconds:6.2f} s")
@@ -1,5 +1,8 @@
 import streamlit as st
 
+from modules.prefetch import start_prefetcher
+from modules.warmup import start_warmup
+
 # 페이지 설정
 st.set_page_config(
     page_title="이탈률 분석 대시보드 홈",
@@ -7,6 +10,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# 백그라운드 데이터 갱신 + 화면 미리 만들기 시작 (분석 페이지로 가기 전에 미리 로드)
+start_warmup()
+start_prefetcher()
+
 # 메인 헤더
 st.title("🏠 이탈률 분석 대시보드")
 st.markdown("---")
@@ -24,6 +31,7 @@ st.markdown("""
 - **실시간 데이터 연동**: Google Sheets와 연동하여 최신 데이터 자동 업데이트
 - **연도별 비교 분석**: 2024년과 2025년 데이터 비교를 통한 트렌드 파악
 - **구간별 세부 분석**: 다양한 학습 구간별 이탈률 상세 분석
+- **전체 구간 비교**: 모든 구간의 연도별 이탈률을 한 화면의 작은 그래프들로 비교
 - **시각화**: 직관적인 차트와 그래프를 통한 데이터 시각화
 """)
 
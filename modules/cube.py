@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class ComparisonCube:
+    """연도 × 기간(주차/월) × 패널 이탈률 큐브
+
+    데이터셋이 게시될 때 한 번만 만들고, 연도 비교는 모두 배열 슬라이스로 처리합니다.
+    - rates : [연도, 기간, 패널] 이탈률 (없는 기간은 NaN)
+    - counts : [연도, 기간] 신규 활성 수업 수 (없는 기간은 NaN)
+    - rows : [연도, 기간] 원본 df 의 행 위치 (없으면 -1)
+    - rate_diff / count_diff : 모든 연도 쌍의 차이 [연도1, 연도2, ...] = 연도2 - 연도1
+    version 은 게시된 데이터셋 버전 토큰 (화면 계산 캐시 키로 씀)
+    """
+
+    def __init__(self, df, panel_cos, version=None):
+        self.df = df
+        self.version = version
+        self.panel_cos = list(panel_cos)
+        self.week = '주차' in df.columns
+        self.period_col = '주차' if self.week else '월'
+        self.years = np.array(sorted(df['연도'].unique()), dtype=int)
+        # ISO 주차는 53주까지 있을 수 있음
+        self.periods = np.arange(1, (53 if self.week else 12) + 1)
+        self._panel_index = {panel: i for i, panel in enumerate(self.panel_cos)}
+
+        year_idx = np.searchsorted(self.years, df['연도'].to_numpy(dtype=int))
+        period_idx = df[self.period_col].to_numpy(dtype=int) - 1
+        shape = (len(self.years), len(self.periods))
+
+        self.rows = np.full(shape, -1, dtype=np.int32)
+        self.rows[year_idx, period_idx] = np.arange(len(df))
+        self.present = self.rows >= 0
+
+        self.rates = np.full(shape + (len(self.panel_cos),), np.nan, dtype=np.float32)
+        self.rates[year_idx, period_idx] = df[self.panel_cos].to_numpy(dtype=np.float32)
+
+        self.counts = np.full(shape, np.nan, dtype=np.float32)
+        self.counts[year_idx, period_idx] = df['신규 활성 수업 수'].to_numpy(dtype=np.float32)
+
+        self.rate_diff = self.rates[None] - self.rates[:, None]
+        self.count_diff = self.counts[None] - self.counts[:, None]
+
+    def has_year(self, year):
+        return bool(np.isin(year, self.years))
+
+    def year_index(self, year):
+        """연도의 큐브 인덱스. 데이터에 없는 연도면 KeyError"""
+        i = int(np.searchsorted(self.years, year))
+        if i >= len(self.years) or self.years[i] != year:
+            raise KeyError(f"{year}년 데이터가 없습니다 (있는 연도: {', '.join(map(str, self.years))})")
+        return i
+
+    def panel_index(self, panel):
+        return self._panel_index[panel]
+
+    def common_mask(self, year1, year2):
+        """두 연도에 공통으로 있는 마지막 기간까지의 기간 마스크 (공통 기간이 없으면 전체)"""
+        both = self.present[self.year_index(year1)] & self.present[self.year_index(year2)]
+        limit = self.periods[both].max() if both.any() else self.periods.max()
+        return self.periods <= limit
+
+    def year_frame(self, year, mask):
+        """해당 연도에서 mask 기간에 있는 행만 원본 df 에서 꺼낸 프레임"""
+        rows = self.rows[self.year_index(year)][mask]
+        return self.df.iloc[rows[rows >= 0]]
+
+    def rate_view(self, year1, year2, panel):
+        """(연도1 이탈률, 연도2 이탈률, 연도2 - 연도1) 기간별 배열 (복사 없는 슬라이스)"""
+        y1, y2, k = self.year_index(year1), self.year_index(year2), self.panel_index(panel)
+        return self.rates[y1, :, k], self.rates[y2, :, k], self.rate_diff[y1, y2, :, k]
+
+    def count_view(self, year1, year2):
+        """(연도1 수업 수, 연도2 수업 수, 연도2 - 연도1) 기간별 배열 (복사 없는 슬라이스)"""
+        y1, y2 = self.year_index(year1), self.year_index(year2)
+        return self.counts[y1], self.counts[y2], self.count_diff[y1, y2]
@@ -1,72 +1,400 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime, timedelta
+import os
 import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
 
-@st.cache_data(ttl=300)
-def load_google_sheets_data(worksheet:str, week:bool):
-    """Google Sheets에서 데이터 로드"""
-    
-    # Streamlit secrets에서 인증 정보 가져오기
-    if "gcp_service_account" in st.secrets:
-        credentials_info = dict(st.secrets["gcp_service_account"])
-    else:
-        # 로컬에서 실행 시 - pj_appscript.json 파일 사용
-        with open('./pj_appscript.json', 'r') as f:
-            credentials_info = json.load(f)
+from modules.sheets_client import DASHBOARD_WORKSHEETS, SheetsUnavailable, get_backend
+from modules.snapshot import load_snapshot, save_snapshot
+from modules.dataset_store import get_dataset_store
+from modules.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 공유 데이터셋을 시트와 다시 대조하는 주기 (초)
+CACHE_TTL = 300
+
+# 증분 로딩은 최근 행만 다시 받으므로 그보다 앞의 수정은 놓침
+# 증분 새로고침이 이 횟수만큼 쌓였거나 마지막 전체 로딩이 이 시간보다 오래됐으면 전체를 다시 받음
+FULL_RELOAD_EVERY = int(os.environ.get("DASHBOARD_FULL_RELOAD_EVERY", "20"))
+FULL_RELOAD_HOURS = float(os.environ.get("DASHBOARD_FULL_RELOAD_HOURS", "24"))
+
+# 같은 워크시트에 대한 동시 새로고침은 진행 중인 요청 하나로 합침 (워크시트 단위)
+_refresh_flight = SingleFlight()
+
+# 백그라운드 재검증 중인 revision (중복 실행 방지)
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+# 워크시트 스키마
+# 시트는 앞 3컬럼(시작일, 종료일, 신규 활성 수업 수) 뒤로 퍼센트 패널 컬럼이 이어짐
+# head/tail 은 패널 컬럼 앞/뒤에 둘 컬럼 순서, dtypes 는 저장 dtype
+SOURCE_COLUMNS = ['시작일', '종료일', '신규 활성 수업 수']
+RATE_DTYPE = 'float32'
+
+WEEK_SCHEMA = {
+    "head": ['연도', '날짜', '주차', '시작일', '종료일', '신규 활성 수업 수'],
+    "tail": [],
+    "dtypes": {'연도': 'int16', '주차': 'int8', '신규 활성 수업 수': 'int32'},
+}
+
+MONTH_SCHEMA = {
+    "head": ['시작일', '종료일', '신규 활성 수업 수'],
+    "tail": ['날짜', '연도', '월'],
+    "dtypes": {'연도': 'int16', '월': 'int8', '신규 활성 수업 수': 'int32'},
+}
+
+
+def parse_rate_values(columns):
+    """패널 컬럼별 비율 값(0.1234)을 한 번에 퍼센트(12.34) float32 2차원 배열로 변환
+
+    columns : 패널별 값 시퀀스. 반환 모양은 (행, 패널), 빈 값은 NaN
+    """
+    values = np.array(columns, dtype=object)
+    values[values == ''] = np.nan
+    return (values.astype('float64') * 100).astype(RATE_DTYPE).T
+
+
+def split_sheet_values(values):
+    """시트 값 [헤더, *행] → (헤더, 컬럼별 값 튜플 리스트)
+
+    행별 dict 를 만들지 않고 바로 컬럼 배열로 바꿉니다.
+    API 가 잘라낸 뒷부분 빈 칸은 채우고, 헤더 없는 오른쪽 컬럼은 버립니다.
+    """
+    header = list(values[0]) if values else []
+    while header and header[-1] == '':
+        header.pop()
+    width = len(header)
+
+    rows = [row[:width] + [''] * (width - len(row)) for row in values[1:]]
+    columns = list(zip(*rows)) if rows else [()] * width
+    return header, columns
 
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_info, scope)
-    client = gspread.authorize(creds)
 
-    # 스프레드시트 열기
-    spreadsheet = client.open("🔥🔥🔥 경험그룹_KPI (수업 기준!!!!!) 🔥🔥🔥")
-    worksheet = spreadsheet.worksheet(worksheet)
+def frame_memory_mb(df):
+    """데이터프레임 메모리 사용량 (MB)"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
 
-    # 데이터 가져오기
-    data = worksheet.get_all_records()
-    df = pd.DataFrame(data)
 
-    # 퍼센트 문자열 → float
-    for i in df.columns[3:]:
-        df[f'{i}'] = df[f'{i}'].str.replace('%', '').astype(float)
+def clean_sheet_values(values, week:bool):
+    """시트 값 [헤더, *행] 을 대시보드용 데이터프레임으로 정제
+
+    시작일/종료일은 datetime64 그대로 두고 화면에 그릴 때 포맷합니다.
+    """
+    schema = WEEK_SCHEMA if week else MONTH_SCHEMA
+    header, columns = split_sheet_values(values)
+    raw = dict(zip(header, columns))
+
+    # 패널 컬럼
+    panel_cos = header[len(SOURCE_COLUMNS):]
+
+    # 오늘 이전 데이터만 사용
+    # 아직 채워지지 않은 미래 행은 빈 칸이라 정수 변환 전에 먼저 버림
+    start = pd.to_datetime(pd.Series(raw['시작일'], dtype=object))
+    keep = (start < datetime.now()).to_numpy()
+    start = start[keep].reset_index(drop=True)
+
+    # 비율 → 퍼센트 float32 (패널 전체 한 번에)
+    rates = pd.DataFrame(parse_rate_values(columns[len(SOURCE_COLUMNS):])[keep], columns=panel_cos)
 
     # 날짜 처리
-    df['날짜'] = pd.to_datetime(df['시작일'])
-    df['시작일'] = pd.to_datetime(df['시작일']).dt.strftime('%m-%d')
-    df['종료일'] = pd.to_datetime(df['종료일']).dt.strftime('%m-%d')
+    columns = {
+        '날짜': start,
+        '시작일': start,
+        '종료일': pd.Series(pd.to_datetime(np.asarray(raw['종료일'], dtype=object)[keep])),
+        '신규 활성 수업 수': pd.Series(np.asarray(raw['신규 활성 수업 수'], dtype=object)[keep]),
+    }
     if week:
         # ISO 주차/연도 (월요일 시작, 연말 자동 조정)
-        iso_calendar = df['날짜'].dt.isocalendar()
-        df['연도'] = iso_calendar.year
-        df['주차'] = iso_calendar.week
+        iso_calendar = start.dt.isocalendar()
+        columns['연도'] = iso_calendar.year
+        columns['주차'] = iso_calendar.week
+    else:
+        # 월별 정보 추출
+        columns['연도'] = start.dt.year
+        columns['월'] = start.dt.month
+    base = pd.DataFrame(columns).astype(schema["dtypes"])
 
-        # 패널 컬럼
-        panel_cos = list(df.columns[3:-3])
+    df = pd.concat([base[schema["head"]], rates, base[schema["tail"]]], axis=1)
+    return df, panel_cos
 
-        # 최종 컬럼 선택
-        df = df[['연도', '날짜', '주차', '시작일', '종료일', '신규 활성 수업 수'] + panel_cos]
 
-        # 오늘 이전 데이터만 사용
-        today = datetime.now()
-        df = df[df['날짜'] < today]
-    else:
-        # 월별 정보 추출
-        df['연도'] = df['날짜'].dt.year
-        df['월'] = df['날짜'].dt.month
-        # 오늘 이전 데이터만 사용
-        today = datetime.now()
-        df = df[df['날짜'] < today]
+# 주/월별 구간 성숙 기간 파일 (페이지 설정에서 따로 지정하지 않으면 이 파일을 씀)
+TRUE_RANGE_FILES = {True: "./true_range.json", False: "./true_range_month.json"}
+
+
+def read_true_range(path:str):
+    """구간별 성숙 기간 파일 읽기 → {구간: 기간 수}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_true_range(week:bool):
+    """구간별 성숙 기간 (true_range.json / true_range_month.json)"""
+    return read_true_range(TRUE_RANGE_FILES[week])
+
+
+def default_recent_window(week:bool):
+    """증분 로딩 시 다시 받을 최근 행 수
+
+    true_range(_month).json 의 가장 긴 성숙 기간만큼은 값이 계속 바뀌므로 다시 받음
+    """
+    return max(abs(v) for v in load_true_range(week).values())
+
+
+def _tail_start(meta, df, window):
+    """스냅샷 기준으로 다시 받기 시작할 레코드 인덱스. 증분 불가면 None"""
+    raw_rows = meta.get("raw_rows")
+    if not raw_rows or not meta.get("last_start"):
+        return None
+    # 마지막 행은 겹치게 받아서 앞부분이 바뀌지 않았는지 확인하고,
+    # 오늘 이후라 잘려 나간 행은 항상 다시 받음
+    return max(0, min(len(df), raw_rows - max(window, 1)))
+
+
+def _full_reload_due(meta, now):
+    """증분 새로고침이 많이 쌓였거나 마지막 전체 로딩이 오래된 스냅샷이면 True"""
+    if meta.get("incremental_refreshes", FULL_RELOAD_EVERY) >= FULL_RELOAD_EVERY:
+        return True
+    try:
+        full_at = datetime.fromisoformat(meta["full_at"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return now - full_at >= timedelta(hours=FULL_RELOAD_HOURS)
+
+
+def _merge_tail(snapshot, tail_values, tail_start, week:bool):
+    """스냅샷 프레임에 다시 받은 꼬리 행을 병합. 앞부분이 바뀌었으면 None"""
+    df, panel_cos, meta = snapshot
+    rows = tail_values[1:]
+    overlap = meta["raw_rows"] - 1 - tail_start
+    if overlap >= len(rows) or rows[overlap][0] != meta["last_start"]:
+        return None
+
+    tail_df, tail_panel_cos = clean_sheet_values(tail_values, week)
+    if tail_panel_cos != panel_cos:
+        return None
+
+    cutoff = pd.to_datetime(rows[0][0])
+    df = pd.concat([df[df['날짜'] < cutoff], tail_df], ignore_index=True)
+    return df, panel_cos
+
+
+def refresh_worksheets(backend, worksheets, incremental=False, recent_window=None):
+    """워크시트들을 batch 요청 한 번으로 받아 정제하고 스냅샷 저장 + 공유 저장소에 게시
+
+    worksheets : {워크시트 이름: week 여부}
+    incremental : True 면 스냅샷 이후 추가된 행 + 최근 recent_window 행만 받아서 병합
+    recent_window : 다시 받을 최근 행 수 (기본값은 default_recent_window)
+    스냅샷이 있으면 데이터 행은 스냅샷 헤더 폭의 컬럼까지만 받음
+    증분이라도 전체 로딩 주기(FULL_RELOAD_EVERY / FULL_RELOAD_HOURS)가 된 워크시트는 전체를 받음
+    """
+    # 데이터보다 revision 을 먼저 읽어야 그 사이 변경을 놓치지 않음
+    revision = backend.revision()
+    now = datetime.now()
+
+    snapshots, tail_starts, widths = {}, {}, {}
+    for worksheet, week in worksheets.items():
+        snapshot = load_snapshot(worksheet)
+        if snapshot is None or not snapshot[2].get("width"):
+            continue
+        snapshots[worksheet] = snapshot
+        widths[worksheet] = snapshot[2]["width"]
+        if incremental and not _full_reload_due(snapshot[2], now):
+            window = recent_window if recent_window is not None else default_recent_window(week)
+            tail_start = _tail_start(snapshot[2], snapshot[0], window)
+            if tail_start is not None:
+                tail_starts[worksheet] = tail_start
+
+    # 시트 행 번호: 헤더=1행, 첫 데이터=2행
+    start_rows = {worksheet: tail_start + 2 for worksheet, tail_start in tail_starts.items()}
+    batch = backend.fetch_values_batch(list(worksheets), start_rows=start_rows, widths=widths)
+
+    # 컬럼 구성이 바뀌었거나 앞부분이 수정돼서 병합이 안 되는 워크시트는 전체를 다시 받음
+    frames, full_reload = {}, []
+    for worksheet, week in worksheets.items():
+        values = batch[worksheet]
+        header, _ = split_sheet_values(values[:1])
+        if worksheet in widths and len(header) != widths[worksheet]:
+            full_reload.append(worksheet)
+        elif worksheet in tail_starts:
+            merged = _merge_tail(snapshots[worksheet], values, tail_starts[worksheet], week)
+            if merged is None:
+                full_reload.append(worksheet)
+                continue
+            frames[worksheet] = (*merged, tail_starts[worksheet], values)
+        else:
+            frames[worksheet] = (*clean_sheet_values(values, week), 0, values)
+
+    if full_reload:
+        batch = backend.fetch_values_batch(full_reload)
+        for worksheet in full_reload:
+            values = batch[worksheet]
+            frames[worksheet] = (*clean_sheet_values(values, worksheets[worksheet]), 0, values)
+
+    store = get_dataset_store()
+    result = {}
+    for worksheet, (df, panel_cos, tail_start, values) in frames.items():
+        rows = values[1:]
+        extra = {
+            "raw_rows": tail_start + len(rows),
+            "last_start": rows[-1][0] if rows else None,
+            "width": len(split_sheet_values(values[:1])[0]),
+        }
+        if tail_start:
+            # 꼬리만 받은 경우: 마지막 전체 로딩 시각은 그대로, 증분 횟수만 늘림
+            meta = snapshots[worksheet][2]
+            extra["full_at"] = meta.get("full_at")
+            extra["incremental_refreshes"] = meta.get("incremental_refreshes", 0) + 1
+        else:
+            extra["full_at"] = now.isoformat(timespec="seconds")
+            extra["incremental_refreshes"] = 0
+        # 스냅샷은 재시작 대비용이라 디스크 쓰기가 실패해도 새 버전 게시는 계속함
+        try:
+            save_snapshot(worksheet, df, panel_cos, revision, extra)
+        except OSError as e:
+            logger.warning("스냅샷 저장 실패 (%s): %s", worksheet, e)
+        result[worksheet] = store.publish(worksheet, df, panel_cos, revision)
+    return result
+
+
+def refresh_worksheets_once(backend, worksheets, incremental=False):
+    """refresh_worksheets 의 single-flight 버전 (워크시트 단위)
+
+    이미 다른 요청이 받는 중인 워크시트는 새로 요청하지 않고 그 결과를 같이 쓰고,
+    나머지 워크시트만 batch 요청 한 번으로 받음 (묶음이 달라도 겹치는 워크시트는 합쳐짐)
+    """
+    def refresh(own):
+        subset = {worksheet: worksheets[worksheet] for worksheet in own}
+        return refresh_worksheets(backend, subset, incremental=incremental)
+
+    return _refresh_flight.do_many(list(worksheets), refresh)
+
+
+def _target_worksheets(worksheet:str, week:bool):
+    # 요청한 워크시트와 함께 대시보드 워크시트 전체를 한 번에 갱신
+    return {**DASHBOARD_WORKSHEETS, worksheet: week}
+
+
+def _revalidate(backend, worksheets, cached_revision):
+    """스냅샷 revision 이 시트와 다르면 새로 받아서 교체 (stale-while-revalidate)"""
+    try:
+        if backend.revision() != cached_revision:
+            # 새 버전은 공유 저장소에 바로 게시되어 다음 rerun 부터 보임
+            refresh_worksheets_once(backend, worksheets, incremental=True)
+        store = get_dataset_store()
+        for worksheet in worksheets:
+            store.mark_checked(worksheet)
+    except Exception as e:
+        logger.warning("스냅샷 재검증 실패: %s", e)
+    finally:
+        with _revalidating_lock:
+            _revalidating.discard(cached_revision)
+
+
+def _start_revalidation(backend, worksheets, cached_revision):
+    # revision 은 스프레드시트 단위라서 같은 revision 은 한 번만 재검증
+    with _revalidating_lock:
+        if cached_revision in _revalidating:
+            return
+        _revalidating.add(cached_revision)
+    threading.Thread(
+        target=_revalidate,
+        args=(backend, worksheets, cached_revision),
+        daemon=True,
+    ).start()
+
+
+def sync_worksheets(backend, worksheets):
+    """공유 저장소를 시트와 맞춤 (백그라운드 prefetch 용)
+
+    저장소에 없는 워크시트는 스냅샷 → 시트 순으로 올리고,
+    시트 revision 이 게시된 버전과 다르면 변경분만 받아 새 버전을 게시
+    """
+    store = get_dataset_store()
+
+    missing = {}
+    for worksheet, week in worksheets.items():
+        if store.latest(worksheet) is not None:
+            continue
+        snapshot = load_snapshot(worksheet)
+        if snapshot is None:
+            missing[worksheet] = week
+        else:
+            store.publish(worksheet, snapshot[0], snapshot[1], snapshot[2]["revision"])
+    if missing:
+        refresh_worksheets_once(backend, missing)
+
+    revision = backend.revision()
+    stale = {
+        worksheet: week for worksheet, week in worksheets.items()
+        if store.latest(worksheet).revision != revision
+    }
+    if stale:
+        refresh_worksheets_once(backend, stale, incremental=True)
+    for worksheet in worksheets:
+        store.mark_checked(worksheet)
+
+
+def get_dataset(worksheet:str, week:bool, ttl=CACHE_TTL):
+    """공유 저장소에서 워크시트 최신 데이터셋 조회
+
+    저장소에 없으면 로컬 스냅샷 → 없으면 Google Sheets(대시보드 워크시트 전체 batch) 순으로 로드.
+    시트와 대조한 지 ttl 초가 지났으면 현재 버전을 그대로 주고 revision 확인은 백그라운드에서 수행
+    """
+    backend = get_backend()
+    store = get_dataset_store()
+    worksheets = _target_worksheets(worksheet, week)
+
+    dataset = store.latest(worksheet)
+    if dataset is not None:
+        if time.time() - store.checked_at(worksheet) > ttl:
+            _start_revalidation(backend, worksheets, dataset.revision)
+        return dataset
+
+    snapshot = load_snapshot(worksheet)
+    if snapshot is not None:
+        df, panel_cos, meta = snapshot
+        dataset = store.publish(worksheet, df, panel_cos, meta["revision"])
+        _start_revalidation(backend, worksheets, meta["revision"])
+        st.success(f"✅ 스냅샷 데이터 로드 성공! ({len(df)}행, {frame_memory_mb(df):.2f}MB, {meta['saved_at']} 저장)")
+        return dataset
+
+    # 스냅샷이 없으면 대체할 데이터가 없으므로 SheetsUnavailable 은 그대로 올려보냄
+    dataset = refresh_worksheets_once(backend, worksheets)[worksheet]
+    st.success(f"✅ Google Sheets 데이터 로드 성공! ({len(dataset.df)}행, {frame_memory_mb(dataset.df):.2f}MB)")
+    return dataset
+
+
+def get_session_dataset(worksheet:str, week:bool, session_key:str):
+    """세션에는 버전 토큰만 두고, 데이터는 공유 저장소에서 참조로 읽음
+
+    세션은 새로고침 전까지 처음 본 버전을 유지하고, 그 버전이 밀려났으면 최신 버전으로 넘어감
+    """
+    version = st.session_state.get(session_key)
+    dataset = get_dataset_store().get(worksheet, version) if version else None
+    if dataset is None:
+        dataset = get_dataset(worksheet, week)
+        st.session_state[session_key] = dataset.version
+    return dataset
+
 
-        # 패널 컬럼
-        panel_cos = list(df.columns[3:-3])
+def refresh_session_dataset(worksheet:str, week:bool, session_key:str):
+    """새로고침 버튼: 해당 워크시트 변경분만 받아 새 버전을 게시하고 세션을 최신 버전으로 옮김
 
-    st.success(f"✅ Google Sheets 데이터 로드 성공! ({len(df)}행)")
+    여러 세션이 동시에 눌러도 시트 요청은 한 번만 나감.
+    쿼터 초과 등으로 재시도를 다 써도 실패하면 지금 보던 마지막 정상 버전을 유지하고 False 반환
+    """
+    try:
+        refresh_worksheets_once(get_backend(), {worksheet: week}, incremental=True)
+    except SheetsUnavailable as e:
+        st.warning(f"⚠️ Google Sheets 요청이 제한되어 마지막으로 불러온 데이터를 표시합니다. ({e})")
+        return False
+    st.session_state.pop(session_key, None)
+    return True
 
-    return df, panel_cos
\ No newline at end of file
@@ -0,0 +1,116 @@
+import time
+import hashlib
+import logging
+import threading
+from typing import NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+from modules.cube import ComparisonCube
+
+logger = logging.getLogger(__name__)
+
+
+class Dataset(NamedTuple):
+    """저장소에 게시된 워크시트 데이터 한 버전
+
+    df 는 모든 세션이 참조로 같이 읽으므로 절대 수정하지 않습니다.
+    (필터링/컬럼 추가가 필요하면 항상 새 프레임을 만드세요)
+    cube 는 게시할 때 한 번 만든 연도 × 기간 × 패널 비교 큐브입니다.
+    """
+    worksheet: str
+    version: str
+    df: pd.DataFrame
+    panel_cos: list
+    revision: str
+    published_at: float
+    cube: ComparisonCube
+
+
+def dataset_version(worksheet, df, panel_cos):
+    """프레임 내용과 구간 목록으로 만든 짧은 버전 토큰
+
+    시트 revision 은 스프레드시트의 다른 탭만 고쳐도 바뀌므로 넣지 않음.
+    같은 데이터면 재시작 후에도 같은 토큰이 나와서 디스크 캐시 키로도 쓸 수 있음
+    """
+    digest = hashlib.sha1(f"{worksheet}|{'|'.join(panel_cos)}".encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+class DatasetStore:
+    """프로세스 전체에서 공유하는 불변 데이터셋 저장소
+
+    세션은 버전 토큰만 들고 있고 데이터는 여기서 참조로 읽습니다.
+    새 버전 게시는 dict 항목 교체 한 번이라 읽는 쪽은 항상 온전한 버전만 봅니다.
+    """
+
+    def __init__(self, keep_versions=2):
+        self.keep_versions = keep_versions
+        self._latest = {}
+        self._versions = {}
+        self._checked_at = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn):
+        """새 버전이 게시될 때마다 fn(dataset) 호출 (내용이 같아 재사용된 경우는 제외)"""
+        self._listeners.append(fn)
+
+    def publish(self, worksheet, df, panel_cos, revision):
+        """새 버전 게시. 내용이 같으면 기존 버전을 그대로 반환 (revision 만 새 값으로 갱신)"""
+        version = dataset_version(worksheet, df, panel_cos)
+        with self._lock:
+            current = self._latest.get(worksheet)
+            if current is not None and current.version == version:
+                # 다른 탭 수정 등으로 revision 만 바뀐 경우: 큐브/캐시는 그대로 쓰고 다시 받지 않도록 revision 만 맞춤
+                if current.revision != revision:
+                    current = current._replace(revision=revision)
+                    self._latest[worksheet] = current
+                    self._versions[worksheet][version] = current
+                self._checked_at[worksheet] = time.time()
+                return current
+
+            dataset = Dataset(
+                worksheet, version, df, list(panel_cos), revision, time.time(),
+                ComparisonCube(df, panel_cos, version)
+            )
+            versions = self._versions.setdefault(worksheet, {})
+            versions[version] = dataset
+            # 진행 중인 rerun 이 이전 버전을 계속 쓸 수 있도록 최근 몇 개만 보관
+            while len(versions) > self.keep_versions:
+                versions.pop(next(iter(versions)))
+            self._latest[worksheet] = dataset
+            self._checked_at[worksheet] = dataset.published_at
+
+        for fn in list(self._listeners):
+            try:
+                fn(dataset)
+            except Exception as e:
+                logger.warning("게시 알림 실패: %s", e)
+        return dataset
+
+    def mark_checked(self, worksheet):
+        """시트와 대조해서 최신임을 확인한 시각 기록"""
+        self._checked_at[worksheet] = time.time()
+
+    def checked_at(self, worksheet):
+        return self._checked_at.get(worksheet, 0)
+
+    def latest(self, worksheet):
+        return self._latest.get(worksheet)
+
+    def datasets(self):
+        """워크시트별 최신 데이터셋 목록"""
+        return list(self._latest.values())
+
+    def get(self, worksheet, version):
+        """특정 버전 조회. 이미 밀려났으면 None"""
+        return self._versions.get(worksheet, {}).get(version)
+
+
+@st.cache_resource
+def get_dataset_store():
+    """프로세스 전체에서 하나만 쓰는 데이터셋 저장소"""
+    return DatasetStore()
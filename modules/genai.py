@@ -1,18 +1,178 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
 from google import genai
+from google.genai import types
 import streamlit as st
 
-# 전체 데이터로 보고서 생성
-def full_data_report(df):
-    """전체 데이터프레임을 Gemini에게 전달해서 종합 보고서 생성"""
+from modules.report_cache import report_key, load_report, save_report, new_report
+from modules.report_summary import (
+    REPORT_TABLE_FORMAT, REPORT_TOKEN_BUDGET, PromptData, compact_data, estimate_frame_tokens, estimate_tokens
+)
+from modules.page_registry import true_range_for
+from modules.singleflight import SingleFlight, StreamFlight
+
+logger = logging.getLogger(__name__)
+
+# 보고서 생성 모델
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# 프롬프트 문구나 데이터 구성을 바꾸면 올려서 예전에 저장된 보고서를 쓰지 않도록
+PROMPT_VERSION = 2
+
+# 보고서를 받는 대로 화면에 조금씩 보여줌 (0 이면 다 받은 뒤 한 번에)
+REPORT_STREAMING = os.environ.get("DASHBOARD_REPORT_STREAMING", "1") != "0"
+
+# 단계별 병렬 보고서: 동시에 보낼 요청 수, 요청 하나의 제한 시간(초)
+REPORT_SECTION_WORKERS = int(os.environ.get("DASHBOARD_REPORT_SECTION_WORKERS", "10"))
+REPORT_SECTION_TIMEOUT = float(os.environ.get("DASHBOARD_REPORT_SECTION_TIMEOUT", "60"))
+
+# 퍼널 단계별 설명 (단계별 보고서는 데이터에 있는 단계만 이 순서로 섹션을 만듦)
+STAGE_DESCRIPTIONS = {
+    "결제": "결제 단계에서의 이탈률",
+    "과외신청서": "과외신청서 작성 단계에서의 이탈률",
+    "1. 결제 직후 매칭 전": "결제 완료 후 선생님 매칭 전까지의 이탈률",
+    "2. 매칭 직후 첫 수업 전": "매칭 완료 후 첫 수업 시작 전까지의 이탈률",
+    "3. 첫 수업 후 2회차 수업 전": "첫 수업 완료 후 두 번째 수업 전까지의 이탈률",
+    "4. 2회차 수업 후 DM 1.0 이하": "두 번째 수업 후 1개월 완주 전까지의 이탈률",
+    "5. DM 1 총 이탈": "1개월 완주 전 총 이탈률",
+    "DM 3 총 이탈": "3개월 완주 전 총 이탈률",
+    "DM 4 총 이탈 (4미만)": "4개월 완주 전 총 이탈률",
+    "단골 전환 4개월 이상": "4개월 이상 지속한 단골 고객 비율",
+}
+
+# 같은 보고서를 여러 세션이 동시에 요청하면 API 호출 하나로 합침
+_report_flight = SingleFlight()
+# 스트리밍도 같은 보고서는 스트림 하나로 합치고, 나중에 온 세션은 받은 조각부터 같이 받음
+_report_streams = StreamFlight()
+
+
+class ReportPrompt(NamedTuple):
+    """보고서 프롬프트와 크기 (full_tokens 는 요약 표 대신 df.to_string() 을 넣었을 때 추정치)"""
+    text: str
+    tokens: int
+    full_tokens: int
+    data: PromptData
+
+
+class SectionResult(NamedTuple):
+    """단계별 보고서의 섹션 하나 (실패/시간 초과면 error 에 이유)"""
+    panel: str
+    text: str
+    seconds: float
+    prompt_tokens: int
+    error: str = ""
+
+
+class GenAIUnavailable(Exception):
+    """API 키가 없어 보고서를 만들 수 없음"""
+
+
+class GeminiClient:
+    """google-genai 기반 실제 Gemini 클라이언트"""
+
+    def __init__(self, api_key):
+        self._client = genai.Client(api_key=api_key)
+
+    def generate(self, model, prompt, timeout=None):
+        """timeout 초 안에 응답이 없으면 HTTP 요청을 끊고 예외"""
+        config = None
+        if timeout:
+            config = types.GenerateContentConfig(http_options=types.HttpOptions(timeout=int(timeout * 1000)))
+        response = self._client.models.generate_content(
+            model=model,
+            contents=[{"role": "user", "parts": [{"text": prompt}]}],
+            config=config
+        )
+        return response.text
+
+    def stream(self, model, prompt):
+        """응답을 받는 대로 텍스트 조각을 하나씩 반환"""
+        for chunk in self._client.models.generate_content_stream(
+            model=model,
+            contents=[{"role": "user", "parts": [{"text": prompt}]}]
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeGenAIClient:
+    """오프라인 개발/측정용 가짜 클라이언트
+
+    delay 초만큼 기다린 뒤 프롬프트 크기를 적은 고정 보고서를 반환하고 호출 수를 셈
+    stream 은 같은 보고서를 chunks 조각으로 나눠 delay / chunks 초마다 하나씩 반환
+    """
+
+    def __init__(self, delay=0.0, chunks=8):
+        self.delay = delay
+        self.chunks = chunks
+        self.calls = 0
+
+    def _text(self, model, prompt):
+        self.calls += 1
+        lines = [f"## (Fake) {model} 보고서", "", f"- 프롬프트 {len(prompt):,}자", f"- 호출 번호 {self.calls}"]
+        lines += [f"- 요약 {i + 1}: 가짜 클라이언트가 만든 문장입니다." for i in range(self.chunks)]
+        return "\n".join(lines) + "\n"
+
+    def generate(self, model, prompt, timeout=None):
+        text = self._text(model, prompt)
+        if timeout is not None and self.delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{timeout:.1f}초 안에 응답 없음")
+        time.sleep(self.delay)
+        return text
+
+    def stream(self, model, prompt):
+        text = self._text(model, prompt)
+        size = -(-len(text) // self.chunks)
+        for start in range(0, len(text), size):
+            time.sleep(self.delay / self.chunks)
+            yield text[start:start + size]
+
+
+@st.cache_resource
+def get_genai_client():
+    """프로세스 전체에서 공유하는 보고서 생성 클라이언트
+
+    환경변수 DASHBOARD_GENAI_BACKEND=fake 이면 가짜 클라이언트
+    (전체 응답 DASHBOARD_FAKE_GENAI_DELAY 초) 사용
+    """
+    if os.environ.get("DASHBOARD_GENAI_BACKEND") == "fake":
+        return FakeGenAIClient(delay=float(os.environ.get("DASHBOARD_FAKE_GENAI_DELAY", "0")))
+    try:
+        api_key = st.secrets["genai"]["APIKEY"]
+    except (KeyError, FileNotFoundError) as e:  # secrets 파일이 없으면 FileNotFoundError
+        raise GenAIUnavailable(f"secrets 에 genai.APIKEY 가 없습니다 ({e})")
+    return GeminiClient(api_key)
 
-    # 전체 데이터를 텍스트로 변환
-    data_text = df.to_string()
+
+def prompt_version(mode="full"):
+    """캐시 키용 프롬프트 버전 (표 형식/토큰 예산/보고서 방식이 바뀌어도 다른 보고서)"""
+    version = f"{PROMPT_VERSION}.{REPORT_TABLE_FORMAT}.{REPORT_TOKEN_BUDGET}"
+    return version if mode == "full" else f"{version}.{mode}"
+
+
+def report_prompt(dataset, budget=None, fmt=None):
+    """데이터셋 요약 표로 보고서 프롬프트 생성
+
+    전체 프레임 대신 연도/분기 평균, 전년 대비 증감, 최근 값(집계 중인 값 제외)만 넣고
+    토큰 예산을 넘으면 분기/최근 표를 줄임
+    """
+    df = dataset.df
+
+    # 전체 데이터 대신 토큰 예산 안의 요약 표
+    data = compact_data(dataset.cube, true_range_for(dataset), budget=budget, fmt=fmt)
+    data_text = data.text
 
     # 데이터에서 연도 범위 동적으로 추출
     min_year = df['연도'].min()
     max_year = df['연도'].max()
     min_date = df['날짜'].min().strftime('%Y년 %m월')
     max_date = df['날짜'].max().strftime('%Y년 %m월')
+    stage_lines = "\n    ".join(f'- "{panel}": {text}' for panel, text in STAGE_DESCRIPTIONS.items())
 
     prompt = f"""
     다음은 교육 서비스의 주별 타겟 신규 수업 이탈률 분석 데이터입니다 ({min_date}부터 {max_date}까지).
@@ -22,23 +182,14 @@ def full_data_report(df):
 
     **데이터 컬럼 설명:**
     - DM (Done_Month): 수업을 지속한 개월 수 (1달=DM1, 2달=DM2, 3달=DM3, 4달=DM4)
-    - "결제": 결제 단계에서의 이탈률
-    - "과외신청서": 과외신청서 작성 단계에서의 이탈률
-    - "1. 결제 직후 매칭 전": 결제 완료 후 선생님 매칭 전까지의 이탈률
-    - "2. 매칭 직후 첫 수업 전": 매칭 완료 후 첫 수업 시작 전까지의 이탈률
-    - "3. 첫 수업 후 2회차 수업 전": 첫 수업 완료 후 두 번째 수업 전까지의 이탈률
-    - "4. 2회차 수업 후 DM 1.0 이하": 두 번째 수업 후 1개월 완주 전까지의 이탈률
-    - "5. DM 1 총 이탈": 1개월 완주 전 총 이탈률
-    - "DM 3 총 이탈": 3개월 완주 전 총 이탈률
-    - "DM 4 총 이탈 (4미만)": 4개월 완주 전 총 이탈률
-    - "단골 전환 4개월 이상": 4개월 이상 지속한 단골 고객 비율
+    {stage_lines}
 
     **중요한 데이터 특성:**
     - 이탈률은 후행 지표로, 수업 시작 후 일정 기간이 지나야 정확한 측정이 가능합니다
     - {max_year}년 최근 데이터 (특히 7-9월)는 아직 이탈률 집계가 완료되지 않았을 수 있습니다
-    - "단골 전환 4개월 이상" 등 장기 지표는 최근 데이터에서 0.00으로 표시되는 것은 정상입니다 (아직 4개월이 지나지 않음)
+    - 구간별 성숙 기간이 지나지 않아 집계가 끝나지 않은 값은 평균에서 빼고 최근 값 표에서는 빈 칸으로 두었습니다
 
-    전체 데이터:
+    요약 데이터 (이탈률 단위 %, 소수 첫째 자리):
     {data_text}
 
     보고서에 포함할 내용:
@@ -56,18 +207,220 @@ def full_data_report(df):
 
     한국어로 500-700단어 정도의 상세한 보고서를 작성해주세요.
     """
-    
+    tokens = estimate_tokens(prompt)
+    # 비교용 전체 표 크기는 표를 문자열로 만들지 않고 프레임 모양으로만 추정
+    full_tokens = tokens - data.tokens + estimate_frame_tokens(df)
+    return ReportPrompt(prompt, tokens, full_tokens, data)
+
+
+# 전체 데이터로 보고서 생성
+def full_data_report(dataset, client=None):
+    """데이터셋 요약을 Gemini에게 전달해서 종합 보고서 생성 (캐시 없이 매번 호출)"""
+    client = client or get_genai_client()
+    return client.generate(GEMINI_MODEL, report_prompt(dataset).text)
+
+
+def report_stages(dataset):
+    """섹션으로 나눌 단계 (설명이 있는 단계 중 데이터에 있는 것, 하나도 없으면 모든 구간)"""
+    stages = [panel for panel in STAGE_DESCRIPTIONS if panel in dataset.panel_cos]
+    return stages or list(dataset.panel_cos)
+
+
+def section_prompt(dataset, panel, true_range):
+    """한 단계의 데이터만 넣은 섹션 프롬프트 → (프롬프트, 토큰 추정치)"""
+    data = compact_data(dataset.cube, true_range, panels=[panel])
+    unit = "주" if dataset.cube.week else "월"
+    prompt = f"""
+    다음은 교육 서비스 신규 수업 이탈률 데이터 중 "{panel}" 단계({STAGE_DESCRIPTIONS.get(panel, panel)})만 요약한 표입니다.
+    - 집계 단위: {unit}
+    - 성숙 기간이 지나지 않아 집계가 끝나지 않은 값은 평균에서 빼고 최근 값 표에서는 빈 칸으로 두었습니다
+
+    요약 데이터 (이탈률 단위 %, 소수 첫째 자리):
+    {data.text}
+
+    이 단계만 다루는 보고서 섹션을 작성해주세요:
+    1. 연도별 추세와 전년 같은 기간 대비 증감
+    2. 최근 분기/기간의 변화 (빈 칸인 값은 해석하지 말 것)
+    3. 이 단계의 구체적인 개선 방안 1-2개
+
+    한국어로 150-200단어, 소제목 없이 본문만 작성해주세요.
+    """
+    return prompt, estimate_tokens(prompt)
+
+
+def summary_prompt(dataset, sections):
+    """섹션 결과만으로 만드는 경영진 요약 프롬프트"""
+    body = "\n\n".join(f"[{section.panel}]\n{section.text.strip()}" for section in sections)
+    return f"""
+    다음은 교육 서비스 신규 수업 이탈 퍼널의 단계별 분석입니다 ({dataset.worksheet}).
+
+{body}
+
+    위 분석만 근거로 경영진용 요약을 작성해주세요:
+    1. 퍼널 전체에서 가장 문제가 되는 단계 2-3개
+    2. 전년 대비 개선된 단계와 악화된 단계
+    3. 우선순위가 높은 개선 방안 3개
+
+    한국어로 200-300단어 정도로 작성해주세요.
+    """
+
+
+def _run_section(client, dataset, panel, true_range, timeout):
+    started = time.perf_counter()
+    prompt, tokens = section_prompt(dataset, panel, true_range)
     try:
-        if "genai" in st.secrets:
-            APIKEY = st.secrets["genai"]["APIKEY"]
-            client = genai.Client(api_key=APIKEY)
-
-            # 모델 이름과 함께 generate_content 직접 호출
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[{"role": "user", "parts": [{"text": prompt}]}]
+        text = client.generate(GEMINI_MODEL, prompt, timeout=timeout)
+        return SectionResult(panel, text, time.perf_counter() - started, tokens)
+    except Exception as e:
+        return SectionResult(panel, "", time.perf_counter() - started, tokens, f"{type(e).__name__}: {e}")
+
+
+def sectioned_report(dataset, client=None, workers=None, timeout=None, on_section=None):
+    """단계별 섹션을 스레드 풀에서 동시에 만든 뒤 섹션 결과로 요약을 만들어 합친 보고서
+
+    → (보고서 텍스트, SectionResult 목록, 프롬프트 토큰 합)
+    동시 요청은 workers 개까지, 요청마다 timeout 초 제한이라 전체 시간은
+    섹션 합이 아니라 대략 (가장 느린 섹션 + 요약) 입니다.
+    실패/시간 초과 섹션은 보고서에 표시만 하고 요약은 성공한 섹션으로 만듦
+    on_section(완료 수, 전체 수, SectionResult) 은 호출한 스레드에서 불림 (진행 표시용)
+    """
+    client = client or get_genai_client()
+    workers = workers or REPORT_SECTION_WORKERS
+    timeout = timeout or REPORT_SECTION_TIMEOUT
+    true_range = true_range_for(dataset)
+    stages = report_stages(dataset)
+
+    started = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-section") as executor:
+        futures = [
+            executor.submit(_run_section, client, dataset, panel, true_range, timeout)
+            for panel in stages
+        ]
+        for future in as_completed(futures):
+            section = future.result()
+            results[section.panel] = section
+            if on_section is not None:
+                on_section(len(results), len(stages), section)
+    sections = [results[panel] for panel in stages]
+
+    done = [section for section in sections if not section.error]
+    if not done:
+        raise RuntimeError(f"모든 단계 섹션 생성에 실패했습니다 ({sections[0].error})")
+    prompt = summary_prompt(dataset, done)
+    summary = client.generate(GEMINI_MODEL, prompt, timeout=timeout)
+
+    logger.info(
+        "%s 단계별 보고서: 섹션 %d개 (실패 %d개), 가장 느린 섹션 %.2f초 / 섹션 합 %.2f초, 전체 %.2f초 (동시 %d개)",
+        dataset.worksheet, len(sections), len(sections) - len(done),
+        max(section.seconds for section in sections), sum(section.seconds for section in sections),
+        time.perf_counter() - started, workers
+    )
+
+    lines = ["## 📌 요약", summary.strip(), "", "## 🔍 단계별 분석"]
+    for section in sections:
+        body = section.text.strip() if not section.error else f"_섹션 생성 실패: {section.error}_"
+        lines += ["", f"### {section.panel}", body]
+    tokens = sum(section.prompt_tokens for section in sections) + estimate_tokens(prompt)
+    return "\n".join(lines) + "\n", sections, tokens
+
+
+def _generate_sectioned_report(dataset, key, client, on_section):
+    text, _, tokens = sectioned_report(dataset, client, on_section=on_section)
+    report = new_report(
+        text, dataset.version, GEMINI_MODEL, prompt_version("sections"), tokens, estimate_frame_tokens(dataset.df)
+    )
+    save_report(key, report)
+    return report
+
+
+def _generate_report(dataset, key, client):
+    prompt = report_prompt(dataset)
+    logger.info(
+        "%s 프롬프트 ~%s → ~%s토큰 (분기 %d년, 최근 %d기간)",
+        dataset.worksheet, f"{prompt.full_tokens:,}", f"{prompt.tokens:,}",
+        prompt.data.quarter_years, prompt.data.recent_periods
+    )
+    text = client.generate(GEMINI_MODEL, prompt.text)
+    report = new_report(
+        text, dataset.version, GEMINI_MODEL, prompt_version(), prompt.tokens, prompt.full_tokens
+    )
+    save_report(key, report)
+    return report
+
+
+class ReportStream:
+    """보고서를 받는 대로 조각 단위로 내보내는 이터레이터 (st.write_stream 에 그대로 넘김)
+
+    끝까지 받으면 전체 텍스트를 디스크에 저장해서 report 에 담고,
+    first_chunk_seconds / seconds 에 첫 조각까지 / 전체 걸린 시간을 기록
+    같은 보고서를 이미 받는 중이면 새로 요청하지 않고 그 스트림의 조각을 같이 받음
+    """
+
+    def __init__(self, dataset, client=None):
+        self.dataset = dataset
+        self.client = client or get_genai_client()
+        self.report = None
+        self.first_chunk_seconds = None
+        self.seconds = None
+
+    def __iter__(self):
+        started = time.perf_counter()
+        prompt = report_prompt(self.dataset)
+        key = report_key(self.dataset.version, GEMINI_MODEL, prompt_version())
+
+        def finish(chunks):
+            report = new_report(
+                "".join(chunks), self.dataset.version, GEMINI_MODEL, prompt_version(),
+                prompt.tokens, prompt.full_tokens
             )
+            save_report(key, report)
+            return report
 
-            return response.text  # 또는 적절한 필드
-    except Exception as e:
-        return f"오류: {e}"
\ No newline at end of file
+        chunks = _report_streams.stream(key, lambda: self.client.stream(GEMINI_MODEL, prompt.text), finish)
+        try:
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as done:
+                    self.report = done.value
+                    break
+                if self.first_chunk_seconds is None:
+                    self.first_chunk_seconds = time.perf_counter() - started
+                yield chunk
+        finally:
+            chunks.close()
+        self.seconds = time.perf_counter() - started
+
+        logger.info(
+            "%s 스트리밍 보고서: 첫 조각 %.2f초, 전체 %.2f초",
+            self.dataset.worksheet, self.first_chunk_seconds or 0, self.seconds
+        )
+
+
+def cached_report(dataset, mode="full"):
+    """디스크에 저장된 이 데이터셋 버전의 보고서 (없으면 None)"""
+    return load_report(report_key(dataset.version, GEMINI_MODEL, prompt_version(mode)))
+
+
+def get_report(dataset, regenerate=False, client=None, mode="full", on_section=None):
+    """데이터셋 버전 보고서를 디스크 캐시에서 꺼내거나 새로 생성 → (CachedReport, 캐시 적중 여부)
+
+    키는 (데이터셋 버전, 모델, 프롬프트 버전) 해시라서 같은 주의 같은 데이터면
+    모든 세션/재시작 후에도 같은 보고서를 재사용함. regenerate=True 면 새로 만들어 덮어씀
+    mode="sections" 면 단계별 병렬 보고서 (on_section 으로 진행 표시)
+    """
+    if not regenerate:
+        report = cached_report(dataset, mode)
+        if report is not None:
+            return report, True
+    key = report_key(dataset.version, GEMINI_MODEL, prompt_version(mode))
+    if mode == "full":
+        # 같은 보고서를 스트리밍으로 받는 중이면 새로 요청하지 않고 저장될 보고서를 기다림
+        streaming, report = _report_streams.wait(key)
+        if streaming:
+            return report, False
+    client = client or get_genai_client()
+    if mode == "sections":
+        return _report_flight.do(key, _generate_sectioned_report, dataset, key, client, on_section), False
+    return _report_flight.do(key, _generate_report, dataset, key, client), False
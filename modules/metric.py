@@ -1,28 +1,71 @@
+import numpy as np
 import pandas as pd
 
-def cal_rate(df_year1, df_year2, pannel_column, year1, year2):
-    # 두 데이터프레임의 길이를 맞춰주기
-    min_length = min(len(df_year1), len(df_year2))
+from modules.preprocessing import align_periods, aligned_periods
+from modules.view_cache import cached_view
 
-    df_year1_trimmed = df_year1.head(min_length).reset_index(drop=True)
-    df_year2_trimmed = df_year2.head(min_length).reset_index(drop=True)
+def _aligned(cube, year1, year2):
+    # 두 연도를 같은 주차/월 키로 맞춘 이번년도(year2) 프레임과 기간 인덱스
+    df_year2 = align_periods(cube, [year1, year2])[1]
+    return df_year2, df_year2[cube.period_col].to_numpy() - 1
 
-    df_diff_rate = df_year2_trimmed.copy()
-    df_diff_rate[f'{year1}_{pannel_column}_이탈율'] = df_year1_trimmed[f'{pannel_column}'].values
-    df_diff_rate[f'{year2}_{pannel_column}_이탈율'] = df_year2_trimmed[f'{pannel_column}'].values
-    df_diff_rate['diff_pp'] = df_diff_rate[f'{year2}_{pannel_column}_이탈율'] - df_diff_rate[f'{year1}_{pannel_column}_이탈율']  # p.p. 차이
-    return df_diff_rate
 
+@cached_view
+def cal_rate(cube, pannel_column, year1, year2):
+    # 큐브에서 두 연도의 같은 기간 값을 슬라이스로 꺼내기
+    df_diff_rate, period_idx = _aligned(cube, year1, year2)
+    rate_year1, rate_year2, diff = cube.rate_view(year1, year2, pannel_column)
+
+    df_diff_rate[f'{year1}_{pannel_column}_이탈율'] = rate_year1[period_idx]
+    df_diff_rate[f'{year2}_{pannel_column}_이탈율'] = rate_year2[period_idx]
+    df_diff_rate['diff_pp'] = diff[period_idx]  # p.p. 차이 (한쪽이 없는 기간은 NaN)
+    return df_diff_rate
 
-def cal_count(df_year1, df_year2, year1, year2):
-    # 두 데이터프레임의 길이를 맞춰주기
-    min_length = min(len(df_year1), len(df_year2))
 
-    df_year1_trimmed = df_year1.head(min_length).reset_index(drop=True)
-    df_year2_trimmed = df_year2.head(min_length).reset_index(drop=True)
+@cached_view
+def cal_count(cube, year1, year2):
+    # 큐브에서 두 연도의 같은 기간 수업 수를 슬라이스로 꺼내기
+    df_diff_count, period_idx = _aligned(cube, year1, year2)
+    count_year1, count_year2, diff = cube.count_view(year1, year2)
 
-    df_diff_count = df_year2_trimmed.copy()
-    df_diff_count[f'{year1}_count'] = df_year1_trimmed['신규 활성 수업 수'].values
-    df_diff_count[f'{year2}_count'] = df_year2_trimmed['신규 활성 수업 수'].values
-    df_diff_count['diff_count'] = df_diff_count[f'{year2}_count'] - df_diff_count[f'{year1}_count']
+    df_diff_count[f'{year1}_count'] = count_year1[period_idx]
+    df_diff_count[f'{year2}_count'] = count_year2[period_idx]
+    df_diff_count['diff_count'] = diff[period_idx]
     return df_diff_count
+
+
+@cached_view
+def cal_multi_year(cube, pannel_column, years, base_year):
+    """여러 지난년도를 기준 연도(이번년도)와 한 번에 비교
+
+    큐브에서 (연도, 기간) 값을 한 번에 꺼내 배열 연산으로 계산하므로
+    비용은 연도 수만큼 배열 폭이 늘어나는 정도입니다.
+    반환 컬럼: 기간, {연도}_{구간}_이탈율, {연도}_count, {연도}_diff_pp (기준 연도 - 해당 연도)
+    """
+    all_years = list(years) + [base_year]
+    periods = aligned_periods(cube, all_years)
+    idx = [cube.year_index(year) for year in all_years]
+
+    rates = cube.rates[np.ix_(idx, periods - 1)][:, :, cube.panel_index(pannel_column)]
+    counts = cube.counts[np.ix_(idx, periods - 1)]
+    diff_pp = rates[-1] - rates[:-1]  # p.p. 차이 (연도별)
+
+    data = {cube.period_col: periods}
+    for i, year in enumerate(all_years):
+        data[f'{year}_{pannel_column}_이탈율'] = rates[i]
+        data[f'{year}_count'] = counts[i]
+        if year != base_year:
+            data[f'{year}_diff_pp'] = diff_pp[i]
+    return pd.DataFrame(data)
+
+
+@cached_view
+def cal_all_panels(cube, years, base_year):
+    """모든 구간의 연도별 이탈률을 같은 기간 키로 한 번에
+
+    반환: (기간 배열, rates[연도, 기간, 구간]) 연도 순서는 years + 마지막이 base_year
+    """
+    all_years = list(years) + [base_year]
+    periods = aligned_periods(cube, all_years)
+    idx = [cube.year_index(year) for year in all_years]
+    return periods, cube.rates[np.ix_(idx, periods - 1)]
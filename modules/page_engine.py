@@ -0,0 +1,225 @@
+from datetime import datetime
+
+import streamlit as st
+
+from modules.data_loader import get_session_dataset, refresh_session_dataset, read_true_range
+from modules.prefetch import start_prefetcher
+from modules.warmup import start_warmup
+from modules.views import build_view
+from modules.view_cache import cached_figure, stats_text
+from modules.metric import cal_multi_year
+from modules.plotting import viz_rate_multi_year, multi_year_column_config
+from modules.page_registry import PAGES
+
+# 보고서 방식 표시 이름 → genai.get_report mode
+REPORT_MODES = {"전체 한 번에": "full", "단계별 병렬": "sections"}
+
+
+def load_page(config):
+    """페이지 공통 로딩: warm-up/백그라운드 갱신 시작 + 세션 데이터셋 + 성숙 기간
+
+    반환: (warmer, prefetcher, dataset, true_range)
+    """
+    # 새 데이터 버전이 게시되면 모든 화면을 미리 만들기 + 백그라운드 데이터 갱신 (프로세스당 한 번 시작)
+    warmer = start_warmup()
+    prefetcher = start_prefetcher()
+
+    # Google Sheets 연동 (세션에는 버전 토큰만, 데이터는 공유 저장소에서 참조)
+    dataset = get_session_dataset(
+        worksheet=config.worksheet, week=config.week, session_key=config.session_key
+    )
+    return warmer, prefetcher, dataset, read_true_range(config.true_range_path)
+
+
+def render_sidebar(config, prefetcher, warmer):
+    """사이드바: 갱신/캐시/warm-up 상태 + 새로고침 버튼"""
+    with st.sidebar:
+        st.subheader("메뉴")
+        st.caption(prefetcher.status_text())
+        st.caption(stats_text())
+        if warmer is not None:
+            st.caption(warmer.status_text())
+
+        if st.button("🔄 데이터 새로고침"):
+            if refresh_session_dataset(config.worksheet, config.week, config.session_key):
+                st.rerun()
+
+
+# 연도/구간 선택 + 차트/테이블은 독립된 조각(fragment)
+# 여기 위젯을 바꾸면 데이터 로딩/보고서 부분은 다시 실행하지 않고 이 함수만 다시 실행됨
+@st.fragment
+def comparison_section(config, dataset, true_range):
+    # 연도 선택 radio 버튼
+    current_year = datetime.now().year
+    previous_years = [int(year) for year in dataset.cube.years if year < current_year]
+    if not dataset.cube.has_year(current_year) or not previous_years:
+        st.info(f"비교할 연도 데이터가 없습니다. (이번년도 {current_year}년과 지난년도가 모두 있어야 합니다)")
+        return
+
+    st.subheader("🎯 비교분석할 연도 선택")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        year1 = st.radio("지난년도", previous_years, key="year1")
+    with col2:
+        st.write("**이번년도**")
+        year2 = current_year
+        st.write(f"{year2}년 (고정)")
+
+    st.subheader("🎯 분석할 구간 선택")
+    selected_panel = st.selectbox(
+        "분석하고 싶은 구간을 선택하세요:",
+        options=dataset.panel_cos,
+        index=0,
+        help="하나의 구간을 선택할 수 있습니다"
+    )
+
+    # 선택한 화면 데이터/그림/테이블 (데이터셋 버전 기준 캐시, warm-up 이 미리 채워 둠)
+    view = build_view(dataset, year1, year2, selected_panel, true_range)
+
+    # 시각화 생성
+    if selected_panel == '단골 전환 4개월 이상':
+        st.subheader(f"📈 {selected_panel} 분석")
+    else:
+        st.subheader(f"📈 {selected_panel} 이탈률 분석")
+    st.plotly_chart(view.fig)
+    st.caption(f"그림 전송 크기: {view.fig_bytes / 1024:.1f}KB")
+
+    # 테이블 (지난연도 vs 이번연도 비교)
+    st.subheader(f"📊 데이터 테이블 ({year1} vs {year2} 비교)")
+    st.dataframe(view.table, column_config=view.table_config, hide_index=True)
+
+    # 여러 연도 비교 (선택한 지난년도들을 이번년도와 한 그림에서)
+    if config.multi_year and len(previous_years) > 1 and st.toggle("여러 연도 한 번에 비교", key="multi_year"):
+        st.subheader(f"📈 여러 연도 비교 (vs {year2})")
+        years = st.multiselect("비교할 지난년도", previous_years, default=previous_years, key="multi_years")
+        if years:
+            df_multi = cal_multi_year(dataset.cube, selected_panel, years, year2)
+            fig_multi = cached_figure(
+                (dataset.version, "multi_year", config.granularity, years, year2, selected_panel), viz_rate_multi_year,
+                df_multi, selected_panel, years, year2, true_range, week=config.week
+            )
+            st.plotly_chart(fig_multi)
+            st.dataframe(df_multi, column_config=multi_year_column_config(df_multi, week=config.week), hide_index=True)
+        else:
+            st.info("비교할 지난년도를 하나 이상 선택하세요.")
+
+
+def _request_regenerate(regenerate_key, content_key):
+    st.session_state[regenerate_key] = True
+    st.session_state[content_key] = None
+
+
+# 보고서 생성 섹션 (버튼을 눌러도 위의 차트/테이블은 다시 그리지 않는 별도 조각)
+# 조각 안에서는 사이드바에 쓸 수 없어서 보고서 버튼은 본문에 둠
+@st.fragment
+def report_section(config, dataset):
+    # genai 클라이언트는 보고서를 쓰는 페이지에서만 불러옴
+    from modules.genai import REPORT_STREAMING, ReportStream, cached_report, get_report
+
+    # 보고서 상태는 페이지마다 따로 (다른 데이터 보고서가 섞여 보이지 않게)
+    generate_key = f"generate_report_{config.session_key}"
+    regenerate_key = f"regenerate_report_{config.session_key}"
+    content_key = f"report_content_{config.session_key}"
+
+    st.markdown("---")
+    st.header("🤖 AI 보고서 생성")
+
+    # 단계별 병렬: 퍼널 단계마다 섹션을 동시에 만들고 섹션 결과로 요약
+    mode = REPORT_MODES[st.radio(
+        "보고서 방식", list(REPORT_MODES), horizontal=True, key=f"report_mode_{config.session_key}"
+    )]
+
+    if st.button("📑 보고서 출력(Demo)", type="primary"):
+        st.session_state[generate_key] = True
+        st.session_state[regenerate_key] = False
+        st.session_state[content_key] = None  # 새로 생성할 때 기존 내용 초기화
+
+    # 보고서 생성 (같은 데이터 버전/모델/프롬프트 버전의 보고서가 저장돼 있으면 바로 꺼냄)
+    if st.session_state.get(generate_key):
+        if st.session_state.get(content_key) is None:
+            regenerate = st.session_state.get(regenerate_key, False)
+            try:
+                report = None if regenerate else cached_report(dataset, mode)
+                if report is None and mode == "sections":
+                    progress = st.progress(0.0, text="단계별 섹션을 동시에 생성하고 있습니다...")
+
+                    def on_section(done, total, section):
+                        status = "실패" if section.error else f"{section.seconds:.1f}초"
+                        progress.progress(done / total, text=f"섹션 {done}/{total} · {section.panel} ({status})")
+
+                    report, _ = get_report(dataset, regenerate=regenerate, mode=mode, on_section=on_section)
+                    progress.empty()
+                    st.success("보고서 생성 완료!(Demo)")
+                elif report is None and REPORT_STREAMING:
+                    # 받는 대로 바로 보여주고, 다 받으면 아래 보고서 표시로 바꿈
+                    stream = ReportStream(dataset)
+                    placeholder = st.empty()
+                    with placeholder.container():
+                        st.subheader(f"📄 {config.name} 데이터 종합 보고서")
+                        st.write_stream(stream)
+                    placeholder.empty()
+                    report = stream.report
+                    st.success(
+                        f"보고서 생성 완료!(Demo) · 첫 응답 {stream.first_chunk_seconds or 0:.1f}초 · "
+                        f"전체 {stream.seconds:.1f}초"
+                    )
+                elif report is None:
+                    with st.spinner("AI가 보고서를 생성하고 있습니다..."):
+                        report, _ = get_report(dataset, regenerate=regenerate, mode=mode)
+                    st.success("보고서 생성 완료!(Demo)")
+                st.session_state[content_key] = report  # 보고서 내용 저장
+            except Exception as e:
+                st.error(f"보고서 생성 중 오류가 발생했습니다: {e}")
+                st.session_state[generate_key] = False
+
+    # 보고서 표시 (생성된 내용이 있으면 계속 표시)
+    report = st.session_state.get(content_key)
+    if report:
+        st.subheader(f"📄 {config.name} 데이터 종합 보고서")
+        caption = f"{report.model} · 프롬프트 v{report.prompt_version} · {report.created_at} 생성"
+        if report.prompt_tokens:
+            caption += f" · 프롬프트 ~{report.prompt_tokens:,}토큰 (전체 표 ~{report.full_prompt_tokens:,}토큰)"
+        st.caption(caption)
+        st.markdown(report.text)
+
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            # 다운로드 버튼
+            st.download_button(
+                label="📥 보고서 다운로드 (.md)",
+                data=report.text,
+                file_name=f"이탈률_분석_보고서_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                mime="text/markdown"
+            )
+        with col2:
+            # 저장된 보고서 대신 AI에게 새로 요청 (디스크에 저장된 보고서도 덮어씀)
+            # 생성 단계보다 먼저 반영되도록 콜백에서 상태를 바꿈
+            st.button(
+                "🔁 보고서 다시 생성",
+                on_click=_request_regenerate, args=(regenerate_key, content_key)
+            )
+
+
+def render_page(page_id):
+    """PAGES[page_id] 설정으로 분석 페이지 전체를 그림
+
+    모든 분석 페이지가 같은 로딩 → 캐시 → 정렬 → 그리기 경로를 지나므로
+    성능 개선은 한 곳만 고치면 모든 페이지에 적용됩니다.
+    """
+    config = PAGES[page_id]
+    warmer, prefetcher, dataset, true_range = load_page(config)
+
+    # 페이지 설정
+    st.set_page_config(
+        page_title=config.page_title,
+        page_icon="📊",
+        layout="wide"
+    )
+
+    render_sidebar(config, prefetcher, warmer)
+    st.title(config.title)
+
+    comparison_section(config, dataset, true_range)
+    if config.report:
+        report_section(config, dataset)
@@ -0,0 +1,68 @@
+from typing import NamedTuple, Optional
+
+from modules.data_loader import TRUE_RANGE_FILES, read_true_range
+
+
+class PageConfig(NamedTuple):
+    """분석 페이지 하나의 설정
+
+    페이지끼리 다른 건 이 값들뿐이고, 로딩/캐시/정렬/그리기는 page_engine 이 같은 경로로 처리합니다.
+    - name : 화면에 보이는 데이터 이름 (예: 주별 타겟 신규수업)
+    - worksheet / week / session_key : 불러올 워크시트, 주별 여부, 세션에 버전 토큰을 둘 키
+    - true_range_file : 구간별 성숙 기간 파일 (None 이면 주/월 기본 파일)
+    - multi_year / report : 여러 연도 비교, AI 보고서 섹션 사용 여부
+    """
+    name: str
+    worksheet: str
+    week: bool
+    session_key: str
+    true_range_file: Optional[str] = None
+    multi_year: bool = True
+    report: bool = False
+
+    @property
+    def granularity(self):
+        return "week" if self.week else "month"
+
+    @property
+    def true_range_path(self):
+        return self.true_range_file or TRUE_RANGE_FILES[self.week]
+
+    @property
+    def page_title(self):
+        return "주간 이탈률 분석 대시보드" if self.week else "월별 이탈률 분석 대시보드"
+
+    @property
+    def title(self):
+        return f"📊 {self.name} 이탈률 분석"
+
+
+# 페이지 id → 설정 (새 세그먼트는 여기에 한 줄 + pages/ 에 render_page 한 줄)
+PAGES = {
+    "week_target": PageConfig(
+        "주별 타겟 신규수업", "대시보드용_주별타겟신규수업", True, "data_week_target", report=True
+    ),
+    "week_all": PageConfig(
+        "주별 전체 신규수업", "대시보드용_주별전체신규수업", True, "data_week_all"
+    ),
+    "month_target": PageConfig(
+        "월별 타겟 신규수업", "대시보드용_월별타겟신규수업", False, "data_month_target"
+    ),
+    "month_all": PageConfig(
+        "월별 전체 신규수업", "대시보드용_월별전체신규수업", False, "data_month_all"
+    ),
+}
+
+
+def page_for_worksheet(worksheet):
+    """워크시트를 쓰는 페이지 설정 (없으면 None)"""
+    for config in PAGES.values():
+        if config.worksheet == worksheet:
+            return config
+    return None
+
+
+def true_range_for(dataset):
+    """데이터셋 워크시트를 쓰는 페이지와 같은 성숙 기간 (페이지가 없으면 주/월 기본 파일)"""
+    config = page_for_worksheet(dataset.worksheet)
+    return read_true_range(config.true_range_path if config else TRUE_RANGE_FILES[dataset.cube.week])
@@ -1,582 +1,451 @@
+import os
+
 import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
 from plotly.subplots import make_subplots
 import numpy as np
 import pandas as pd
 
-def viz_rate_week(
-    df_year1, df_year2, 
-    selected_panel, 
-    pos, neg, 
-    df_diff_count, df_diff_rate, 
-    year1, year2, 
-    true_range):
-    # 모든 데이터프레임의 길이를 맞춰주기
-    min_length = min(len(df_year1), len(df_year2), len(df_diff_count), len(df_diff_rate))
-
-    df_year1 = df_year1.head(min_length).reset_index(drop=True)
-    df_year2 = df_year2.head(min_length).reset_index(drop=True)
-    df_diff_count = df_diff_count.head(min_length).reset_index(drop=True)
-    df_diff_rate = df_diff_rate.head(min_length).reset_index(drop=True)
-
-    # 서브플롯 생성 (2행 1열, 높이 비율 3:1)
-    fig = make_subplots(
-        rows=2, cols=1,
-        shared_xaxes=True,
-        row_heights=[0.75, 0.25],
-        subplot_titles=(f"{selected_panel} ({year1} vs {year2})", "신규 활성 수업 수"),
-        vertical_spacing=0.05
-    )
+# 그림 JSON 압축 모드 (DASHBOARD_COMPACT_FIGURES=0 이면 끔)
+COMPACT_FIGURES = os.environ.get("DASHBOARD_COMPACT_FIGURES", "1") == "1"
+
+def fmt_date(dates):
+    """datetime 시작일/종료일을 화면 표시용 'MM-DD' 문자열로 변환"""
+    return dates.dt.strftime('%m-%d')
+
+def figure_nbytes(fig):
+    """브라우저로 보내는 그림 JSON 크기 (바이트)"""
+    return len(fig.to_json().encode("utf-8"))
+
+# 2차원(cartesian) 선/막대 그림에서는 쓰지 않는 템플릿 레이아웃 항목
+_UNUSED_TEMPLATE_LAYOUT = ('colorscale', 'coloraxis', 'scene', 'polar', 'ternary', 'geo', 'mapbox')
+_compact_templates = {}
+
+def _compact_template(name, kinds):
+    # 템플릿/트레이스 종류 조합별로 한 번만 만들어 재사용
+    key = (name, kinds)
+    if key not in _compact_templates:
+        template = pio.templates[name]
+        layout = template.layout.to_plotly_json()
+        for prop in _UNUSED_TEMPLATE_LAYOUT:
+            layout.pop(prop, None)
+        _compact_templates[key] = go.layout.Template(
+            layout=layout,
+            data={kind: template.data[kind] for kind in kinds if template.data[kind]}
+        )
+    return _compact_templates[key]
 
-    fig.update_layout(template="seaborn")
+def compact_figure(fig, template="seaborn", decimals=2):
+    """브라우저로 보내는 그림 JSON 줄이기 (template 은 그림을 만들 때 쓴 템플릿 이름)
 
-    # 신뢰도가 낮은 구간 배경색 추가
-    if selected_panel in true_range:
-        range_weeks = abs(true_range[selected_panel])  # 음수를 양수로 변환
-
-        # 데이터의 마지막 주차들 구하기
-        max_week = df_year2['주차'].max() if not df_year2.empty else df_year1['주차'].max()
-        min_week = df_year2['주차'].min() if not df_year2.empty else df_year1['주차'].min()
-
-        # 신뢰도 낮은 구간 계산 (마지막 N주)
-        if range_weeks > 0:
-            cutoff_week = max_week - range_weeks + 0.5  # +1은 경계 포함을 위해
-            if cutoff_week <= max_week:
-                fig.add_vrect(
-                    x0=max(cutoff_week, min_week), x1=max_week + 0.5,
-                    fillcolor="red", opacity=0.1,
-                    layer="below", line_width=0,
-                    annotation_text=f"신뢰도 낮음 ({range_weeks}주)",
-                    annotation_position="top left",
-                    row=1, col=1
-                )
-
-    # 첫 번째 서브플롯: 이탈률 라인 차트
-    # 지난년도 데이터
-    fig.add_trace(
+    - 템플릿에서 그림에 없는 트레이스 종류/좌표계의 기본값 제거 (seaborn 템플릿 크기의 대부분)
+    - 실수 배열은 decimals 자리로 반올림한 float32 로 (Plotly 가 typed array(bdata) 로 보냄)
+    """
+    kinds = tuple(sorted({trace.type for trace in fig.data}))
+    fig.layout.template = _compact_template(template, kinds)
+    for trace in fig.data:
+        for prop in ('y', 'customdata'):
+            values = trace[prop]
+            if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+                trace[prop] = np.round(values, decimals).astype(np.float32)
+    return fig
+
+def viz_rate(
+    df_year1, df_year2,
+    selected_panel,
+    df_diff_count, df_diff_rate,
+    year1, year2,
+    true_range, week=True):
+    """지난년도 vs 이번년도 비교 그림 (위: 이탈률 라인, 아래: 신규 활성 수업 수 바)
+
+    모든 데이터프레임은 align_periods 로 같은 주차/월 키에 맞춰져 있음 (빠진 기간은 NaN)
+    트레이스와 레이아웃을 먼저 다 만든 뒤 go.Figure 한 번으로 생성합니다.
+    """
+    period_col = '주차' if week else '월'
+    unit = '주' if week else '개월'
+    metric = '전환율' if selected_panel == '단골 전환 4개월 이상' else '이탈률'
+
+    # 트레이스들이 같이 쓰는 값은 한 번만 만들기
+    # 기간 라벨(문자열)은 hovertext/text 로, 숫자는 숫자 배열 customdata 로 나눠서
+    # 문자열로 뭉친 customdata 가 트레이스마다 반복되지 않도록 함
+    x = df_year2[period_col].values
+    label1 = (fmt_date(df_year1['시작일']) + '~' + fmt_date(df_year1['종료일'])).values
+    label2 = (fmt_date(df_year2['시작일']) + '~' + fmt_date(df_year2['종료일'])).values
+    count1 = df_diff_count[f'{year1}_count'].values
+    count2 = df_diff_count[f'{year2}_count'].values
+    rate1 = df_year1[selected_panel].values
+    rate2 = df_year2[selected_panel].values
+    diff_pp = df_diff_rate['diff_pp'].values
+    diff_count = df_diff_count['diff_count'].values
+
+    # 양수(악화)/음수(개선) 는 트레이스를 나누지 않고 점마다 hover 색으로 구분
+    has_diff = ~np.isnan(diff_pp)
+    diff_color = np.where(diff_pp >= 0, 'red', 'green')
+
+    traces = [
+        # 지난년도 이탈률
         go.Scatter(
-            x=df_year1['주차'],
-            y=df_year1[selected_panel],
+            x=x, y=rate1,
+            xaxis='x', yaxis='y',
             mode='lines+markers',
             name=str(year1),
             line=dict(color='gray', dash='dash', width=3),
             marker=dict(size=8),
-            customdata=df_year1[['시작일', '종료일', '신규 활성 수업 수']].values,
+            hovertext=label1,
+            customdata=count1,
             hovertemplate=
-                f"<b>{year1}년 %{{x}}주차</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
+                f"<b>{year1}년 %{{x}}{period_col}</b><br>" +
+                "기간: %{hovertext}<br>" +
                 f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
+                "신규 활성 수업 수: %{customdata}<br>" +
                 "<extra></extra>"
         ),
-        row=1, col=1
-    )
-
-    # 이번년도 데이터
-    fig.add_trace(
+        # 이번년도 이탈률
         go.Scatter(
-            x=df_year2['주차'],
-            y=df_year2[selected_panel],
+            x=x, y=rate2,
+            xaxis='x', yaxis='y',
             mode='lines+markers',
             name=str(year2),
             line=dict(color='blue', width=3),
             marker=dict(size=8),
-            customdata=np.column_stack([
-                df_year2['시작일'].values, df_year2['종료일'].values,
-                df_diff_rate['diff_pp'].values
-            ]),
+            hovertext=label2,
+            customdata=diff_pp,
             hovertemplate=
-                f"<b>{year2}년 %{{x}}주차</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
+                f"<b>{year2}년 %{{x}}{period_col}</b><br>" +
+                "기간: %{hovertext}<br>" +
                 f"{selected_panel}: %{{y:.2f}}%<br>" +
-                f"{year1}년 대비: %{{customdata[2]:+.2f}}p.p.<br>" +
+                f"{year1}년 대비: %{{customdata:+.2f}}p.p.<br>" +
                 "<extra></extra>"
         ),
-        row=1, col=1
-    )
-
-    # 평균선 추가
-    avg_year1 = df_year1[selected_panel].mean()
-    avg_year2 = df_year2[selected_panel].mean()
-
-    # 지난년도 평균 라벨 (오른쪽 위 상단)
-    fig.add_annotation(
-        x=1, y=1.03,  # 오른쪽 위, y>1로 해서 플롯 위로 조금 띄움
-        xref="paper", yref="paper",
-        text=f"{year1} 평균: {avg_year1:.2f}%",
-        showarrow=False,
-        font=dict(size=12, color="gray", family="Arial", weight="bold"),
-        align="right"
-    )
-
-    # 이번년도 평균 라벨 (그 옆에 배치, 살짝 왼쪽으로)
-    fig.add_annotation(
-        x=0.85, y=1.03,  # 살짝 왼쪽에 붙여줌
-        xref="paper", yref="paper",
-        text=f"{year2} 평균: {avg_year2:.2f}%",
-        showarrow=False,
-        font=dict(size=12, color="blue", family="Arial", weight="bold"),
-        align="right"
-    )
-
-    # 이번년도 (양수인 경우 - 초록색 표시)
-    fig.add_trace(
+        # 이번년도 차이 표시 (지난년도와 비교 가능한 기간만, text 는 hover 색)
         go.Scatter(
-            x=pos['주차'],
-            y=pos[selected_panel],
+            x=x[has_diff], y=rate2[has_diff],
+            xaxis='x', yaxis='y',
             mode='markers',
             marker=dict(size=10, color="blue"),
-            name=f"{year2} (양수)",
-            customdata=np.column_stack([
-                pos['시작일'].values, 
-                pos['종료일'].values, 
-                pos['신규 활성 수업 수'].values, 
-                np.round(pos["diff_pp"].values, 2)
-            ]),
+            name=f"{year2} ({year1} 대비)",
+            hovertext=label2[has_diff],
+            text=diff_color[has_diff],
+            customdata=np.column_stack([count2, diff_pp])[has_diff],
             hovertemplate=
-                f"<b>{year2}년 %{{x}}주차</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
+                f"<b>{year2}년 %{{x}}{period_col}</b><br>" +
+                "기간: %{hovertext}<br>" +
                 f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
-                f"<span style='color:red'>{year1} 대비: %{{customdata[3]:+}}p.p.</span>" +
+                "신규 활성 수업 수: %{customdata[0]}<br>" +
+                f"<span style='color:%{{text}}'>{year1} 대비: %{{customdata[1]:+.2f}}p.p.</span>" +
                 "<extra></extra>"
         ),
-        row=1, col=1
-    )
-
-    # 이번년도 (음수인 경우 - 빨간색 표시)
-    fig.add_trace(
-        go.Scatter(
-            x=neg['주차'],
-            y=neg[selected_panel],
-            mode='markers',
-            marker=dict(size=10, color="blue"),
-            name=f"{year2} (음수)",
-            customdata=np.column_stack([
-                neg['시작일'].values, 
-                neg['종료일'].values, 
-                neg['신규 활성 수업 수'].values, 
-                np.round(neg["diff_pp"].values, 2)
-            ]),
-            hovertemplate=
-                f"<b>{year2}년 %{{x}}주차</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
-                f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
-                f"<span style='color:green'>{year1} 대비: %{{customdata[3]:+}}p.p.</span>" +
-                "<extra></extra>"
-        ),
-        row=1, col=1
-    )
-    
-        # 신뢰도가 낮은 구간 배경색 추가
-    if selected_panel in true_range:
-        range_weeks = abs(true_range[selected_panel])  # -2 → 2로 변환
-
-        # 이번년도 데이터 기준 마지막 주차
-        max_week = df_year2['주차'].max() if not df_year2.empty else df_year1['주차'].max()
-
-        # 마지막 N주 구간 (예: -2 → 마지막 2주)
-        cutoff_week = max_week - range_weeks + 0.5  # 경계 포함
-
-        fig.add_vrect(
-            x0=cutoff_week, 
-            x1=max_week + 0.5,   # 마지막 구간 살짝 오른쪽까지
-            fillcolor="red", 
-            opacity=0.1,
-            layer="below", 
-            line_width=0,
-            annotation_text=f"신뢰도 낮음 ({range_weeks}주)", 
-            annotation_position="top left",
-            row=1, col=1
-        )
-
-
-    # 두 번째 서브플롯: 신규 활성 수업 수 바 차트
-    # 지난년도 바
-    # 지난년도 막대 (겹침)
-    fig.add_trace(
+        # 지난년도 신규 활성 수업 수 (겹침, text 는 이번년도 기간 라벨이라 막대에는 표시 안 함)
         go.Bar(
-            x=df_diff_count['주차'],
-            y=df_diff_count[f'{year1}_count'],
+            x=x, y=count1,
+            xaxis='x2', yaxis='y2',
             name=f'{year1} 신규 활성 수업',
             marker_color='gray',
             opacity=0.6,
-            customdata=np.column_stack([
-                df_year1['시작일'].values,
-                df_year1['종료일'].values,
-                df_year2['시작일'].values,
-                df_year2['종료일'].values,
-                df_diff_count[f'{year2}_count'].values,
-                df_diff_count['diff_count'].values
-            ]),
+            hovertext=label1,
+            text=label2,
+            textposition='none',
+            customdata=np.column_stack([count2, diff_count]),
             hovertemplate=
-                "<b>%{x}주차 비교</b><br>" +
-                f"{year2}년 (%{{customdata[2]}}~%{{customdata[3]}}): %{{customdata[4]}}개<br>" +
-                f"{year1}년 (%{{customdata[0]}}~%{{customdata[1]}}): %{{y}}개<br>" +
-                "차이: %{customdata[5]:+d}개<br>" +
+                f"<b>%{{x}}{period_col} 비교</b><br>" +
+                f"{year2}년 (%{{text}}): %{{customdata[0]}}개<br>" +
+                f"{year1}년 (%{{hovertext}}): %{{y}}개<br>" +
+                "차이: %{customdata[1]:+d}개<br>" +
                 "<extra></extra>"
         ),
-        row=2, col=1
-    )
-
-    # 이번년도 바
-    fig.add_trace(
+        # 이번년도 신규 활성 수업 수
         go.Bar(
-            x=df_diff_count['주차'],
-            y=df_diff_count[f'{year2}_count'],
+            x=x, y=count2,
+            xaxis='x2', yaxis='y2',
             name=f'{year2} 신규 활성 수업',
             marker_color='blue',
             opacity=0.6,
-            customdata=np.column_stack([
-                df_year2['시작일'].values,
-                df_year2['종료일'].values,
-                df_year1['시작일'].values,
-                df_year1['종료일'].values,
-                df_diff_count[f'{year1}_count'].values,
-                df_diff_count['diff_count'].values
-            ]),
+            hovertext=label2,
+            text=label1,
+            textposition='none',
+            customdata=np.column_stack([count1, diff_count]),
             hovertemplate=
-                "<b>%{x}주차 비교</b><br>" +
-                f"{year2}년 (%{{customdata[0]}}~%{{customdata[1]}}): %{{y}}개<br>" +
-                f"{year1}년 (%{{customdata[2]}}~%{{customdata[3]}}): %{{customdata[4]}}개<br>" +
-                "차이: %{customdata[5]:+d}개<br>" +
+                f"<b>%{{x}}{period_col} 비교</b><br>" +
+                f"{year2}년 (%{{hovertext}}): %{{y}}개<br>" +
+                f"{year1}년 (%{{text}}): %{{customdata[0]}}개<br>" +
+                "차이: %{customdata[1]:+d}개<br>" +
                 "<extra></extra>"
         ),
-        row=2, col=1
-    )
-
-    # 레이아웃 설정
-    if selected_panel == "단골 전환 4개월 이상":
-        fig.update_layout(
-            title_text=f"{selected_panel} 전환율 분석",
-            showlegend=True,
-            height=800,
-            width=1400
-        )
-    else:
-        fig.update_layout(
-            title_text=f"{selected_panel} 이탈률 분석",
-            showlegend=True,
-            height=800,
-            width=1400
-        )
-
-    fig.update_traces(
-        hoverlabel=dict(
-            bgcolor="white",   # 배경 흰색
-            font=dict(size=13) # 글자 크기 키우기
-        )
-    )
-
-    # --- y축 범위 자동 계산 ---
-    # 두 데이터프레임에서 최소/최대 구하기
-    ymin = min(df_year1[selected_panel].min(), df_year2[selected_panel].min())
-    ymax = max(df_year1[selected_panel].max(), df_year2[selected_panel].max())
-
-    # 보기 좋게 여유(10% 정도) 추가
+    ]
+
+    # 서브플롯 제목 + 평균 라벨 (make_subplots 2행 1열, 높이 비율 3:1 과 같은 배치)
+    annotations = [
+        dict(text=f"{selected_panel} ({year1} vs {year2})", x=0.5, y=1.0,
+             xref="paper", yref="paper", xanchor="center", yanchor="bottom",
+             showarrow=False, font=dict(size=16)),
+        dict(text="신규 활성 수업 수", x=0.5, y=0.2375,
+             xref="paper", yref="paper", xanchor="center", yanchor="bottom",
+             showarrow=False, font=dict(size=16)),
+        # 지난년도 평균 라벨 (오른쪽 위 상단)
+        dict(text=f"{year1} 평균: {np.nanmean(rate1):.2f}%", x=1, y=1.03,
+             xref="paper", yref="paper", align="right", showarrow=False,
+             font=dict(size=12, color="gray", family="Arial", weight="bold")),
+        # 이번년도 평균 라벨 (그 옆에 배치, 살짝 왼쪽으로)
+        dict(text=f"{year2} 평균: {np.nanmean(rate2):.2f}%", x=0.85, y=1.03,
+             xref="paper", yref="paper", align="right", showarrow=False,
+             font=dict(size=12, color="blue", family="Arial", weight="bold")),
+    ]
+
+    # 신뢰도가 낮은 구간 배경색 (이번년도 마지막 N주/N개월)
+    shapes = []
+    range_periods = abs(true_range.get(selected_panel, 0))  # 음수를 양수로 변환
+    if range_periods > 0 and len(x):
+        max_period, min_period = x.max(), x.min()
+        x0 = max(max_period - range_periods + 0.5, min_period)  # 경계 포함
+        shapes.append(dict(
+            type="rect", xref="x", yref="y domain",
+            x0=x0, x1=max_period + 0.5, y0=0, y1=1,
+            fillcolor="red", opacity=0.1, layer="below", line_width=0
+        ))
+        annotations.append(dict(
+            text=f"신뢰도 낮음 ({range_periods}{unit})", x=x0, y=1,
+            xref="x", yref="y domain", xanchor="left", yanchor="top", showarrow=False
+        ))
+
+    # --- y축 범위 자동 계산 (보기 좋게 여유 10% 정도 추가) ---
+    ymin = min(np.nanmin(rate1), np.nanmin(rate2))
+    ymax = max(np.nanmax(rate1), np.nanmax(rate2))
     y_margin = (ymax - ymin) * 0.1 if ymax > ymin else 1
-    ymin_fixed = ymin - y_margin
-    ymax_fixed = ymax + y_margin
 
-    # Y축 설정 (자동 고정값 사용)
-    if selected_panel == '단골 전환 4개월 이상':
-        fig.update_yaxes(title_text="전환율 (%)", row=1, col=1, range=[ymin_fixed, ymax_fixed])
-    else:
-        fig.update_yaxes(title_text="이탈률 (%)", row=1, col=1, range=[ymin_fixed, ymax_fixed])
-    fig.update_yaxes(title_text="신규 활성 수업 수", row=2, col=1)
+    # go.Layout 으로 감싸면 템플릿 검증이 두 번 일어나므로 dict 로 넘김
+    layout = dict(
+        template="seaborn",
+        title_text=f"{selected_panel} {metric} 분석",
+        showlegend=True,
+        height=800,
+        width=1400,
+        barmode='overlay',
+        hoverlabel=dict(bgcolor="white", font=dict(size=13)),
+        xaxis=dict(anchor='y', domain=[0.0, 1.0], matches='x2', showticklabels=False),
+        xaxis2=dict(anchor='y2', domain=[0.0, 1.0], title_text=period_col),
+        yaxis=dict(anchor='x', domain=[0.2875, 1.0], title_text=f"{metric} (%)",
+                   range=[ymin - y_margin, ymax + y_margin]),
+        yaxis2=dict(anchor='x2', domain=[0.0, 0.2375], title_text="신규 활성 수업 수"),
+        annotations=annotations,
+        shapes=shapes,
+    )
+    fig = go.Figure(data=traces, layout=layout)
+    return compact_figure(fig) if COMPACT_FIGURES else fig
 
-    # X축 설정
-    fig.update_xaxes(title_text="주차", row=2, col=1)
+def _year_colors(years):
+    # 지난년도 색: 오래된 연도일수록 옅은 회색
+    greys = ['#bdbdbd', '#9e9e9e', '#757575', '#616161', '#424242']
+    return {year: greys[-len(years):][i] if len(years) <= len(greys) else 'gray'
+            for i, year in enumerate(sorted(years))}
 
-    # 바 차트를 그룹으로 설정
-    fig.update_layout(barmode='overlay')
+def viz_rate_multi_year(df_multi, selected_panel, years, base_year, true_range, week=True):
+    """여러 지난년도를 기준 연도와 한 그림에 겹쳐 그리기
 
-    return fig
+    df_multi 는 cal_multi_year 결과 (기간 키 하나에 연도별 컬럼)
+    위: 연도별 이탈률, 아래: 기준 연도 - 지난년도 차이(p.p.)
+    """
+    period_col = '주차' if week else '월'
+    unit = '주' if week else '개월'
+    x = df_multi[period_col]
 
-def viz_rate_month(
-    df_year1, df_year2, 
-    selected_panel, 
-    pos, neg, 
-    df_diff_count, df_diff_rate, 
-    year1, year2, 
-    true_range):
-    # 모든 데이터프레임의 길이를 맞춰주기
-    min_length = min(len(df_year1), len(df_year2), len(df_diff_count), len(df_diff_rate))
-
-    df_year1 = df_year1.head(min_length).reset_index(drop=True)
-    df_year2 = df_year2.head(min_length).reset_index(drop=True)
-    df_diff_count = df_diff_count.head(min_length).reset_index(drop=True)
-    df_diff_rate = df_diff_rate.head(min_length).reset_index(drop=True)
-    # 서브플롯 생성 (2행 1열, 높이 비율 3:1)
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
-        row_heights=[0.75, 0.25],
-        subplot_titles=(f"{selected_panel} ({year1} vs {year2})", "신규 활성 수업 수"),
+        row_heights=[0.7, 0.3],
+        subplot_titles=(
+            f"{selected_panel} ({', '.join(map(str, years))} vs {base_year})",
+            f"{base_year}년 대비 차이 (p.p.)"
+        ),
         vertical_spacing=0.05
     )
-
     fig.update_layout(template="seaborn")
-    
 
-    # 첫 번째 서브플롯: 이탈률 라인 차트
-    # 지난년도 데이터
-    fig.add_trace(
-        go.Scatter(
-            x=df_year1['월'],
-            y=df_year1[selected_panel],
-            mode='lines+markers',
-            name=str(year1),
-            line=dict(color='gray', dash='dash', width=3),
-            marker=dict(size=8),
-            customdata=df_year1[['시작일', '종료일', '신규 활성 수업 수']].values,
-            hovertemplate=
-                f"<b>{year1}년 %{{x}}월</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
-                f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
-                "<extra></extra>"
-        ),
-        row=1, col=1
-    )
+    colors = _year_colors(years)
+
+    for year in sorted(years):
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=df_multi[f'{year}_{selected_panel}_이탈율'],
+                mode='lines+markers',
+                name=str(year),
+                line=dict(color=colors[year], dash='dash', width=2),
+                marker=dict(size=6),
+                customdata=df_multi[f'{year}_count'],
+                hovertemplate=
+                    f"<b>{year}년 %{{x}}{period_col}</b><br>" +
+                    f"{selected_panel}: %{{y:.2f}}%<br>" +
+                    "신규 활성 수업 수: %{customdata:.0f}<br>" +
+                    "<extra></extra>"
+            ),
+            row=1, col=1
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=df_multi[f'{year}_diff_pp'],
+                mode='lines+markers',
+                name=f"{base_year} - {year}",
+                line=dict(color=colors[year], width=2),
+                marker=dict(size=6),
+                showlegend=False,
+                hovertemplate=
+                    f"<b>%{{x}}{period_col}</b><br>" +
+                    f"{year}년 대비: %{{y:+.2f}}p.p.<br>" +
+                    "<extra></extra>"
+            ),
+            row=2, col=1
+        )
 
-    # 이번년도 데이터
+    # 기준 연도
     fig.add_trace(
         go.Scatter(
-            x=df_year2['월'],
-            y=df_year2[selected_panel],
+            x=x,
+            y=df_multi[f'{base_year}_{selected_panel}_이탈율'],
             mode='lines+markers',
-            name=str(year2),
+            name=str(base_year),
             line=dict(color='blue', width=3),
             marker=dict(size=8),
-            customdata=np.column_stack([
-                df_year2['시작일'].values, df_year2['종료일'].values,
-                df_diff_rate['diff_pp'].values
-            ]),
+            customdata=df_multi[f'{base_year}_count'],
             hovertemplate=
-                f"<b>{year2}년 %{{x}}월</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
+                f"<b>{base_year}년 %{{x}}{period_col}</b><br>" +
                 f"{selected_panel}: %{{y:.2f}}%<br>" +
-                f"{year1}년 대비: %{{customdata[2]:+.2f}}p.p.<br>" +
+                "신규 활성 수업 수: %{customdata:.0f}<br>" +
                 "<extra></extra>"
         ),
         row=1, col=1
     )
-
-    # 평균선 추가
-    avg_year1 = df_year1[selected_panel].mean()
-    avg_year2 = df_year2[selected_panel].mean()
-
-    # 지난년도 평균 라벨 (오른쪽 위 상단)
-    fig.add_annotation(
-        x=1, y=1.03,  # 오른쪽 위, y>1로 해서 플롯 위로 조금 띄움
-        xref="paper", yref="paper",
-        text=f"{year1} 평균: {avg_year1:.2f}%",
-        showarrow=False,
-        font=dict(size=12, color="gray", family="Arial", weight="bold"),
-        align="right"
-    )
-
-    # 이번년도 평균 라벨 (그 옆에 배치, 살짝 왼쪽으로)
-    fig.add_annotation(
-        x=0.85, y=1.03,  # 살짝 왼쪽에 붙여줌
-        xref="paper", yref="paper",
-        text=f"{year2} 평균: {avg_year2:.2f}%",
-        showarrow=False,
-        font=dict(size=12, color="blue", family="Arial", weight="bold"),
-        align="right"
+    fig.add_hline(y=0, line_color='black', line_width=1, row=2, col=1)
+
+    # 신뢰도가 낮은 구간 배경색 추가 (기준 연도의 마지막 N기간)
+    last = df_multi.loc[df_multi[f'{base_year}_{selected_panel}_이탈율'].notna(), period_col]
+    if selected_panel in true_range and not last.empty:
+        range_periods = abs(true_range[selected_panel])
+        if range_periods > 0:
+            fig.add_vrect(
+                x0=last.max() - range_periods + 0.5, x1=last.max() + 0.5,
+                fillcolor="red", opacity=0.1,
+                layer="below", line_width=0,
+                annotation_text=f"신뢰도 낮음 ({range_periods}{unit})",
+                annotation_position="top left",
+                row=1, col=1
+            )
+
+    title = "전환율" if selected_panel == "단골 전환 4개월 이상" else "이탈률"
+    fig.update_layout(
+        title_text=f"{selected_panel} {title} 분석 (여러 연도)",
+        showlegend=True,
+        height=800,
+        width=1400
     )
-
-    # 이번년도 (양수인 경우 - 초록색 표시)
-    fig.add_trace(
-        go.Scatter(
-            x=pos['월'],
-            y=pos[selected_panel],
-            mode='markers',
-            marker=dict(size=10, color="blue"),
-            name=f"{year2} (양수)",
-            customdata=np.column_stack([
-                pos['시작일'].values,
-                pos['종료일'].values,
-                pos['신규 활성 수업 수'].values,
-                np.round(pos["diff_pp"].values, 2)
-            ]),
-            hovertemplate=
-                f"<b>{year2}년 %{{x}}월</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
-                f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
-                f"<span style='color:red'>{year1} 대비: %{{customdata[3]:+}}p.p.</span>" +
-                "<extra></extra>"
-        ),
-        row=1, col=1
-    )
-
-    # 이번년도 (음수인 경우 - 빨간색 표시)
-    fig.add_trace(
-        go.Scatter(
-            x=neg['월'],
-            y=neg[selected_panel],
-            mode='markers',
-            marker=dict(size=10, color="blue"),
-            name=f"{year2} (음수)",
-            customdata=np.column_stack([
-                neg['시작일'].values,
-                neg['종료일'].values,
-                neg['신규 활성 수업 수'].values,
-                np.round(neg["diff_pp"].values, 2)
-            ]),
-            hovertemplate=
-                f"<b>{year2}년 %{{x}}월</b><br>" +
-                "기간: %{customdata[0]} ~ %{customdata[1]}<br>" +
-                f"{selected_panel}: %{{y:.2f}}%<br>" +
-                "신규 활성 수업 수: %{customdata[2]}<br>" +
-                f"<span style='color:green'>{year1} 대비: %{{customdata[3]:+}}p.p.</span>" +
-                "<extra></extra>"
-        ),
-        row=1, col=1
-    )
-        # 신뢰도가 낮은 구간 배경색 추가 (월 기준)
-    if selected_panel in true_range:
-        range_months = abs(true_range[selected_panel])  # 음수를 양수로 변환
-
-        # 데이터의 마지막/최소 월 구하기
-        max_month = df_year2['월'].max() if not df_year2.empty else df_year1['월'].max()
-        min_month = df_year2['월'].min() if not df_year2.empty else df_year1['월'].min()
-
-        # 신뢰도 낮은 구간 계산 (마지막 N개월)
-        if range_months > 0:
-            cutoff_month = max_month - range_months + 0.5  # +1은 경계 포함을 위해
-            if cutoff_month <= max_month:
-                fig.add_vrect(
-                    x0=max(cutoff_month, min_month), 
-                    x1=max_month + 0.5,
-                    fillcolor="red", opacity=0.1,
-                    layer="below", line_width=0,
-                    annotation_text=f"신뢰도 낮음 ({range_months}개월)",
-                    annotation_position="top left",
-                    row=1, col=1
-                )
-
-
-    # 두 번째 서브플롯: 신규 활성 수업 수 바 차트
-    # 지난년도 바
-    # 지난년도 막대 (겹침)
-    fig.add_trace(
-        go.Bar(
-            x=df_diff_count['월'],
-            y=df_diff_count[f'{year1}_count'],
-            name=f'{year1} 신규 활성 수업',
-            marker_color='gray',
-            opacity=0.6,
-            customdata=np.column_stack([
-                df_year1['시작일'].values,
-                df_year1['종료일'].values,
-                df_year2['시작일'].values,
-                df_year2['종료일'].values,
-                df_diff_count[f'{year2}_count'].values,
-                df_diff_count['diff_count'].values
-            ]),
-            hovertemplate=
-                "<b>%{x}월 비교</b><br>" +
-                f"{year2}년 (%{{customdata[2]}}~%{{customdata[3]}}): %{{customdata[4]}}개<br>" +
-                f"{year1}년 (%{{customdata[0]}}~%{{customdata[1]}}): %{{y}}개<br>" +
-                "차이: %{customdata[5]:+d}개<br>" +
-                "<extra></extra>"
-        ),
-        row=2, col=1
-    )
-
-    # 이번년도 바
-    fig.add_trace(
-        go.Bar(
-            x=df_diff_count['월'],
-            y=df_diff_count[f'{year2}_count'],
-            name=f'{year2} 신규 활성 수업',
-            marker_color='blue',
-            opacity=0.6,
-            customdata=np.column_stack([
-                df_year2['시작일'].values,
-                df_year2['종료일'].values,
-                df_year1['시작일'].values,
-                df_year1['종료일'].values,
-                df_diff_count[f'{year1}_count'].values,
-                df_diff_count['diff_count'].values
-            ]),
-            hovertemplate=
-                "<b>%{x}월 비교</b><br>" +
-                f"{year2}년 (%{{customdata[0]}}~%{{customdata[1]}}): %{{y}}개<br>" +
-                f"{year1}년 (%{{customdata[2]}}~%{{customdata[3]}}): %{{customdata[4]}}개<br>" +
-                "차이: %{customdata[5]:+d}개<br>" +
-                "<extra></extra>"
-        ),
-        row=2, col=1
-    )
-    
-    if selected_panel == '단골 전환 4개월 이상':
-       # 레이아웃 설정
-        fig.update_layout(
-            title_text=f"{selected_panel} 전환율 분석",
-            showlegend=True,
-            height=800,
-            width=1400
-        )
-    else:
-       # 레이아웃 설정
-        fig.update_layout(
-            title_text=f"{selected_panel} 이탈률 분석",
-            showlegend=True,
-            height=800,
-            width=1400
-        )
-
-    fig.update_traces(
-        hoverlabel=dict(
-            bgcolor="white",   # 배경 흰색
-            font=dict(size=13) # 글자 크기 키우기
+    fig.update_traces(hoverlabel=dict(bgcolor="white", font=dict(size=13)))
+    fig.update_yaxes(title_text=f"{title} (%)", row=1, col=1)
+    fig.update_yaxes(title_text="차이 (p.p.)", row=2, col=1)
+    fig.update_xaxes(title_text=period_col, row=2, col=1)
+
+    return compact_figure(fig) if COMPACT_FIGURES else fig
+
+def _grid_layout(titles, cols, horizontal_spacing=0.05):
+    # make_subplots(shared_xaxes='all') 와 같은 격자 레이아웃을 dict 로 바로 만들기 (칸이 많으면 훨씬 빠름)
+    rows = -(-len(titles) // cols)
+    vertical_spacing = min(0.3 / rows, 0.08)
+    width = (1 - horizontal_spacing * (cols - 1)) / cols
+    height = (1 - vertical_spacing * (rows - 1)) / rows
+
+    layout, annotations = {}, []
+    for k, title in enumerate(titles):
+        row, col = divmod(k, cols)
+        axis = '' if k == 0 else str(k + 1)
+        x0 = col * (width + horizontal_spacing)
+        y1 = 1 - row * (height + vertical_spacing)
+        # 아래에 칸이 더 없는 칸만 x축 눈금 표시
+        bottom = k + cols >= len(titles)
+        layout[f'xaxis{axis}'] = dict(
+            anchor=f'y{axis}', domain=[x0, x0 + width],
+            matches=None if k == 0 else 'x', showticklabels=bottom
         )
+        layout[f'yaxis{axis}'] = dict(anchor=f'x{axis}', domain=[max(y1 - height, 0), y1])
+        annotations.append(dict(
+            text=title, x=x0 + width / 2, y=y1,
+            xref="paper", yref="paper", xanchor="center", yanchor="bottom",
+            showarrow=False, font=dict(size=12)
+        ))
+    return rows, layout, annotations
+
+def viz_all_panels(periods, rates, panel_cos, years, base_year, true_range, week=True, cols=3):
+    """모든 구간의 연도별 이탈률을 작은 그림 격자(small multiples)로 한 번에
+
+    periods, rates 는 cal_all_panels 결과 (rates : [연도, 기간, 구간], years 순서 + 마지막이 기준 연도)
+    점이 많아도 가볍게 그리도록 Scattergl 을 쓰고 x축은 모든 칸이 같이 움직입니다.
+    트레이스/레이아웃은 dict 로 만들어 go.Figure 한 번으로 생성 (검증도 한 번만)
+    """
+    period_col = '주차' if week else '월'
+    all_years = list(years) + [base_year]
+    colors = {**_year_colors(years), base_year: 'blue'}
+    rows, grid, annotations = _grid_layout(panel_cos, cols)
+
+    traces, shapes = [], []
+    for k, panel in enumerate(panel_cos):
+        axis = '' if k == 0 else str(k + 1)
+        for i, year in enumerate(all_years):
+            traces.append(dict(
+                type='scattergl',
+                x=periods, y=rates[i, :, k],
+                xaxis=f'x{axis}', yaxis=f'y{axis}',
+                mode='lines',
+                name=str(year),
+                legendgroup=str(year),  # 범례 클릭 시 모든 칸에서 같이 숨김
+                showlegend=k == 0,
+                line=dict(color=colors[year], width=3 if year == base_year else 1.5,
+                          dash='solid' if year == base_year else 'dash'),
+                hovertemplate=
+                    f"<b>{year}년 %{{x}}{period_col}</b><br>" +
+                    f"{panel}: %{{y:.2f}}%<br>" +
+                    "<extra></extra>"
+            ))
+
+        # 신뢰도가 낮은 구간 배경색 (기준 연도 마지막 N기간)
+        last = periods[~np.isnan(rates[-1, :, k])]
+        range_periods = abs(true_range.get(panel, 0))
+        if range_periods > 0 and len(last):
+            shapes.append(dict(
+                type="rect", xref=f"x{axis}", yref=f"y{axis} domain",
+                x0=last.max() - range_periods + 0.5, x1=last.max() + 0.5, y0=0, y1=1,
+                fillcolor="red", opacity=0.1, layer="below", line_width=0
+            ))
+
+    layout = dict(
+        template="seaborn",
+        title_text=f"전체 구간 비교 ({', '.join(map(str, all_years))})",
+        height=max(400, 230 * rows),
+        annotations=annotations,
+        shapes=shapes,
+        hoverlabel=dict(bgcolor="white", font=dict(size=13)),
+        margin=dict(t=80),
+        **grid
     )
+    fig = go.Figure(data=traces, layout=layout)
+    return compact_figure(fig) if COMPACT_FIGURES else fig
 
-    # --- y축 범위 자동 계산 ---
-    # 두 데이터프레임에서 최소/최대 구하기
-    ymin = min(df_year1[selected_panel].min(), df_year2[selected_panel].min())
-    ymax = max(df_year1[selected_panel].max(), df_year2[selected_panel].max())
-
-    # 보기 좋게 여유(10% 정도) 추가
-    y_margin = (ymax - ymin) * 0.1 if ymax > ymin else 1
-    ymin_fixed = ymin - y_margin
-    ymax_fixed = ymax + y_margin
-
-    # Y축 설정 (자동 고정값 사용)
-    if selected_panel == "단골 전환 4개월 이상":
-        fig.update_yaxes(title_text="전환율 (%)", row=1, col=1, range=[ymin_fixed, ymax_fixed])
-    else: 
-        fig.update_yaxes(title_text="이탈률 (%)", row=1, col=1, range=[ymin_fixed, ymax_fixed])
-    fig.update_yaxes(title_text="신규 활성 수업 수", row=2, col=1)
-
-    # X축 설정
-    fig.update_xaxes(title_text="월", row=2, col=1)
-
-    # 바 차트를 그룹으로 설정
-    fig.update_layout(barmode='overlay')
-
-    return fig
-
-def style_comparison_table(
-    df_year1_reset, df_year2_reset, 
-    df_diff_rate_reset, 
-    year1, year2, 
+def comparison_table(
+    df_year1, df_year2,
+    df_diff_rate,
+    year1, year2,
     selected_panel, week=True):
     """
-    연도별 데이터 비교 테이블을 만들고 스타일 적용한 DataFrame 반환
-    
+    연도별 데이터 비교 테이블과 st.dataframe 용 column_config 반환
+
+    값은 숫자/날짜 그대로(Arrow 로 바로 넘어감) 두고 표시 형식은 column_config 로 지정합니다.
+    라벨/차이 표시는 모두 배열 연산으로 만듭니다.
+
     Parameters
     ----------
-    df_year1_reset : pd.DataFrame
-        지난년도 데이터프레임 (reset_index 된 상태)
-    df_year2_reset : pd.DataFrame
-        이번년도 데이터프레임 (reset_index 된 상태)
-    df_diff_rate_reset : pd.DataFrame
+    df_year1 : pd.DataFrame
+        지난년도 데이터프레임 (align_periods 로 이번년도와 같은 기간 키)
+    df_year2 : pd.DataFrame
+        이번년도 데이터프레임
+    df_diff_rate : pd.DataFrame
         diff_pp 포함된 데이터프레임
     year1 : int
         비교 기준 년도
@@ -584,66 +453,54 @@ def style_comparison_table(
         비교 대상 년도
     selected_panel : str
         비교할 지표명
-    
+
     Returns
     -------
-    styled_df : pd.io.formats.style.Styler
-        스타일이 적용된 DataFrame Styler 객체
+    table : pd.DataFrame
+        비교 테이블
+    column_config : dict
+        컬럼별 표시 형식 (st.dataframe(table, column_config=...))
     """
-
-    comparison_df = pd.DataFrame()
-
-    if week:
-        # 공통 컬럼
-        comparison_df[f'{year1}_연도-주차'] = df_year1_reset['연도'].astype(str) + '-' + df_year1_reset['주차'].astype(str)
-        comparison_df[f'{year1}_시작일-종료일'] = df_year1_reset['시작일'] + '~' + df_year1_reset['종료일']
-
-        # 이번년도 공통 컬럼
-        comparison_df[f'{year2}_연도-주차'] = df_year2_reset['연도'].astype(str) + '-' + df_year2_reset['주차'].astype(str)
-        comparison_df[f'{year2}_시작일-종료일'] = df_year2_reset['시작일'] + '~' + df_year2_reset['종료일']
-
-    else:
-        # 공통 컬럼들
-        comparison_df[f'{year1}_연도-월'] = df_year1_reset['연도'].astype(str) + '-' + df_year1_reset['월'].astype(str)
-        comparison_df[f'{year1}_시작일-종료일'] = df_year1_reset['시작일'] + '~' + df_year1_reset['종료일']
-        
-        # 이번년도 공통 컬럼들
-        comparison_df[f'{year2}_연도-월'] = df_year2_reset['연도'].astype(str) + '-' + df_year2_reset['월'].astype(str)
-        comparison_df[f'{year2}_시작일-종료일'] = df_year2_reset['시작일'] + '~' + df_year2_reset['종료일']
-
-    # 지난년도 데이터
-    comparison_df[f'{year1}_신규활성수업수'] = df_year1_reset['신규 활성 수업 수']
-    comparison_df[f'{year1}_{selected_panel}'] = df_year1_reset[selected_panel]
-
-    # 이번년도 데이터
-    comparison_df[f'{year2}_신규활성수업수'] = df_year2_reset['신규 활성 수업 수']
-    comparison_df[f'{year2}_{selected_panel}'] = df_year2_reset[selected_panel]
-
-    # 차이 계산
-    comparison_df['차이(p.p.)'] = df_diff_rate_reset['diff_pp']
-
-    # 스타일 함수 정의
-    def color_diff_column(val):
-        if pd.isna(val):
-            return ''
-        elif val > 0:
-            return 'color: #d32f2f'  # 빨간색 (악화)
-        elif val < 0:
-            return 'color: #2e7d32'  # 초록색 (개선)
-        else:
-            return ''
-
-    # 숫자 컬럼 포맷 정의
-    format_dict = {}
-    for col in comparison_df.columns:
-        if comparison_df[col].dtype in ['float64', 'int64'] and '수업수' not in col:
-            format_dict[col] = '{:.2f}'
-
-    # 스타일 적용
-    styled_df = comparison_df.style.map(
-        color_diff_column,
-        subset=['차이(p.p.)']
-    ).format(format_dict)
-
-    return styled_df
-
+    period_col = '주차' if week else '월'
+    diff_pp = df_diff_rate['diff_pp'].to_numpy()
+
+    # 두 연도가 같은 기간 키로 맞춰져 있어서 기간 컬럼은 하나만
+    table = pd.DataFrame({
+        period_col: df_year2[period_col].to_numpy(),
+        f'{year1}_시작일': df_year1['시작일'].to_numpy(),
+        f'{year1}_종료일': df_year1['종료일'].to_numpy(),
+        f'{year2}_시작일': df_year2['시작일'].to_numpy(),
+        f'{year2}_종료일': df_year2['종료일'].to_numpy(),
+        f'{year1}_신규활성수업수': df_year1['신규 활성 수업 수'].to_numpy(),
+        f'{year1}_{selected_panel}': df_year1[selected_panel].to_numpy(),
+        f'{year2}_신규활성수업수': df_year2['신규 활성 수업 수'].to_numpy(),
+        f'{year2}_{selected_panel}': df_year2[selected_panel].to_numpy(),
+        '차이(p.p.)': diff_pp,
+        # 빨간색(악화) / 초록색(개선)
+        '변화': np.select([diff_pp > 0, diff_pp < 0], ['🔴 악화', '🟢 개선'], default=''),
+    })
+
+    column_config = {
+        period_col: st.column_config.NumberColumn(format=f"%d{period_col}"),
+        '차이(p.p.)': st.column_config.NumberColumn(format="%+.2f"),
+    }
+    for year in (year1, year2):
+        column_config[f'{year}_시작일'] = st.column_config.DateColumn(format="MM-DD")
+        column_config[f'{year}_종료일'] = st.column_config.DateColumn(format="MM-DD")
+        column_config[f'{year}_신규활성수업수'] = st.column_config.NumberColumn(format="%d")
+        column_config[f'{year}_{selected_panel}'] = st.column_config.NumberColumn(format="%.2f")
+
+    return table, column_config
+
+def multi_year_column_config(df_multi, week=True):
+    """cal_multi_year 결과 테이블용 column_config"""
+    period_col = '주차' if week else '월'
+    column_config = {period_col: st.column_config.NumberColumn(format=f"%d{period_col}")}
+    for col in df_multi.columns:
+        if col.endswith('_count'):
+            column_config[col] = st.column_config.NumberColumn(format="%d")
+        elif col.endswith('_diff_pp'):
+            column_config[col] = st.column_config.NumberColumn(format="%+.2f")
+        elif col.endswith('_이탈율'):
+            column_config[col] = st.column_config.NumberColumn(format="%.2f")
+    return column_config
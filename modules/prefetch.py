@@ -0,0 +1,69 @@
+import time
+import logging
+import threading
+from datetime import datetime
+
+import streamlit as st
+
+from modules.data_loader import CACHE_TTL, sync_worksheets
+from modules.sheets_client import DASHBOARD_WORKSHEETS, get_backend
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """대시보드 워크시트를 주기적으로 시트와 맞추는 백그라운드 스레드
+
+    CACHE_TTL 이 지나기 전에 미리 새 버전을 게시해 두므로
+    사용자 rerun 은 네트워크를 기다리지 않고 공유 저장소만 읽습니다.
+    """
+
+    def __init__(self, worksheets, interval):
+        self.worksheets = dict(worksheets)
+        self.interval = interval
+        self.last_refresh_at = None
+        self.last_duration = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        started = time.perf_counter()
+        try:
+            sync_worksheets(get_backend(), self.worksheets)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning("갱신 실패: %s", e)
+        finally:
+            self.last_duration = time.perf_counter() - started
+            self.last_refresh_at = datetime.now()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="sheets-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status_text(self):
+        """사이드바 표시용 마지막 갱신 시각/소요 시간"""
+        if self.last_refresh_at is None:
+            return "⏳ 데이터 갱신 준비 중..."
+        text = f"🕒 마지막 갱신: {self.last_refresh_at.strftime('%H:%M:%S')} ({self.last_duration:.2f}초)"
+        if self.last_error:
+            text += f"\n\n⚠️ 최근 갱신 실패: {self.last_error}"
+        return text
+
+
+@st.cache_resource
+def start_prefetcher():
+    """서버 프로세스당 한 번만 백그라운드 갱신 시작 (TTL 1분 전마다 실행)"""
+    return Prefetcher(DASHBOARD_WORKSHEETS, interval=max(CACHE_TTL - 60, 30)).start()
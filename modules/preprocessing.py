@@ -1,31 +1,41 @@
-import pandas as pd
+import numpy as np
 
-def cleansing_df_week(df, year1, year2):
-    df_year1 = df[df['연도'] == year1]
-    df_year2 = df[df['연도'] == year2]
+from modules.view_cache import cached_view
 
-    common_weeks = set(df_year1['주차']) & set(df_year2['주차'])
-    if common_weeks:
-        max_common_week = max(common_weeks)
-        df_year1_common = df_year1[df_year1['주차'] <= max_common_week]
-        df_year2_common = df_year2[df_year2['주차'] <= max_common_week]
-    else:
-        df_year1_common = df_year1
-        df_year2_common = df_year2
+def aligned_periods(cube, years):
+    """여러 연도를 비교할 주차(53주차 포함)/월 키
 
-    return df_year1_common, df_year2_common
+    모든 연도에 공통으로 있는 마지막 기간까지, 어느 한 연도라도 있는 기간
+    """
+    present = cube.present[[cube.year_index(year) for year in years]]
+    common = present.all(axis=0)
+    limit = cube.periods[common].max() if common.any() else cube.periods.max()
+    return cube.periods[(cube.periods <= limit) & present.any(axis=0)]
+
+def align_periods(cube, years):
+    """여러 연도를 주차/월 키로 맞춘 연도별 프레임 리스트 반환
+
+    키는 aligned_periods 이고, 해당 연도에 없는 기간은 값이 NaN 인 행으로 채웁니다.
+    (연도/기간 컬럼은 항상 채워짐) 큐브의 행 위치 인덱스로 모든 연도를 한 번에 꺼냅니다.
+    """
+    idx = [cube.year_index(year) for year in years]
+    periods = aligned_periods(cube, years)
+
+    rows = cube.rows[idx][:, periods - 1].ravel()
+    aligned = cube.df.iloc[np.maximum(rows, 0)].reset_index(drop=True)
+    aligned = aligned.mask(np.broadcast_to((rows < 0)[:, None], aligned.shape))
+
+    frames = []
+    for i, year in enumerate(years):
+        frame = aligned.iloc[i * len(periods):(i + 1) * len(periods)].reset_index(drop=True)
+        frame['연도'] = np.int16(year)
+        frame[cube.period_col] = periods.astype(np.int8)
+        frames.append(frame)
+    return frames
 
-def cleansing_df_month(df, year1, year2):
-    df_year1 = df[df['연도'] == year1]
-    df_year2 = df[df['연도'] == year2]
-
-    common_months = set(df_year1['월']) & set(df_year2['월'])
-    if common_months:
-        max_common_month = max(common_months)
-        df_year1_common = df_year1[df_year1['월'] <= max_common_month]
-        df_year2_common = df_year2[df_year2['월'] <= max_common_month]
-    else:
-        df_year1_common = df_year1
-        df_year2_common = df_year2
+@cached_view
+def cleansing_df(cube, year1, year2):
+    # 두 연도를 같은 주차/월 키로 맞추기 (빠진 기간은 NaN 행)
+    df_year1_common, df_year2_common = align_periods(cube, [year1, year2])
 
     return df_year1_common, df_year2_common
@@ -0,0 +1,64 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import NamedTuple
+
+# 생성한 AI 보고서를 저장하는 로컬 폴더 (세션/재시작 사이에 공유)
+REPORT_CACHE_DIR = Path(os.environ.get("DASHBOARD_REPORT_CACHE_DIR", "./.report_cache"))
+
+
+class CachedReport(NamedTuple):
+    """디스크에 저장된 보고서 한 건"""
+    text: str
+    dataset_version: str
+    model: str
+    prompt_version: str
+    created_at: str
+    prompt_tokens: int = 0
+    full_prompt_tokens: int = 0
+
+
+def report_key(dataset_version, model, prompt_version):
+    """(데이터셋 버전, 모델, 프롬프트 버전) 내용 주소 키
+
+    세 값 중 하나라도 바뀌면 다른 키가 되므로 예전 보고서를 지울 필요가 없음
+    """
+    raw = f"{dataset_version}|{model}|{prompt_version}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _path(key):
+    return REPORT_CACHE_DIR / f"{key}.json"
+
+
+def save_report(key, report):
+    """보고서를 json 으로 저장 (임시 파일에 쓴 뒤 교체)"""
+    REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(key)
+    # 같은 보고서를 동시에 저장해도 임시 파일이 겹치지 않도록 쓰는 쪽마다 다른 이름
+    tmp = path.with_suffix(f".json.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report._asdict(), f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_report(key):
+    """저장된 보고서 로드. 없거나 깨졌으면 None"""
+    path = _path(key)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return CachedReport(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def new_report(text, dataset_version, model, prompt_version, prompt_tokens=0, full_prompt_tokens=0):
+    return CachedReport(
+        text, dataset_version, model, str(prompt_version),
+        datetime.now().isoformat(timespec="seconds"), prompt_tokens, full_prompt_tokens
+    )
@@ -0,0 +1,182 @@
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# AI 보고서 프롬프트의 데이터 부분 토큰 예산 (추정치 기준)
+REPORT_TOKEN_BUDGET = int(os.environ.get("DASHBOARD_REPORT_TOKEN_BUDGET", "4000"))
+
+# 표 형식 ("csv" 또는 "markdown")
+REPORT_TABLE_FORMAT = os.environ.get("DASHBOARD_REPORT_TABLE_FORMAT", "csv")
+
+# 예산을 넘으면 위에서부터 차례로 줄여 봄: (분기표에 넣을 최근 연도 수, 최근 값 기간 수)
+# None 은 전체 연도
+COMPACTION_LEVELS = [(None, 8), (2, 8), (2, 4), (1, 4), (0, 4), (0, 0)]
+
+
+class PromptData(NamedTuple):
+    """프롬프트에 넣을 요약 표 텍스트와 크기"""
+    text: str
+    tokens: int
+    quarter_years: int
+    recent_periods: int
+    fits: bool
+
+
+def estimate_tokens(text):
+    """대략적인 토큰 수 (UTF-8 4바이트당 1토큰, 한글은 글자당 0.75토큰 정도)"""
+    return -(-len(text.encode("utf-8")) // 4)
+
+
+# df.to_string() 에서 셀 하나가 차지하는 대략적인 글자 수 (dtype 종류별, 나머지는 4)
+FRAME_CELL_WIDTHS = {"f": 9, "M": 10}
+
+
+def estimate_frame_tokens(df):
+    """df.to_string() 을 그대로 넣었을 때의 대략적인 토큰 수
+
+    표를 문자열로 만들지 않고 행 수와 컬럼별 폭(헤더 길이, dtype 별 셀 폭)으로만 추정 (실제 값과 몇 % 차이)
+    """
+    cells = [max(len(str(col)), FRAME_CELL_WIDTHS.get(dtype.kind, 4)) + 2 for col, dtype in zip(df.columns, df.dtypes)]
+    line = len(str(len(df))) + sum(cells) + 1
+    # 헤더 줄은 한글 컬럼명이 글자당 3바이트
+    header = line + sum(len(str(col).encode("utf-8")) - len(str(col)) for col in df.columns)
+    return -(-(header + len(df) * line) // 4)
+
+
+def maturity_mask(cube, true_range):
+    """[연도, 기간, 패널] 집계가 끝난 값이면 True
+
+    구간마다 데이터의 마지막 N기간(true_range)은 아직 이탈이 다 잡히지 않은 값이라 제외
+    연말/연초에 걸치는 경우도 있어서 연도 → 기간 순으로 펼친 시간축의 마지막 N개를 뺌
+    """
+    matured = np.repeat(cube.present[:, :, None], len(cube.panel_cos), axis=2)
+    timeline = np.flatnonzero(cube.present.ravel())
+    for k, panel in enumerate(cube.panel_cos):
+        window = abs(true_range.get(panel, 0))
+        if window:
+            years, periods = np.unravel_index(timeline[-window:], cube.present.shape)
+            matured[years, periods, k] = False
+    return matured
+
+
+def _masked_rates(cube, matured):
+    return np.where(matured, cube.rates, np.nan)
+
+
+def _period_label(cube, period):
+    return f"W{period:02d}" if cube.week else f"{period}월"
+
+
+def _quarter(cube):
+    """기간별 분기 번호 (53주차는 4분기)"""
+    if cube.week:
+        return np.minimum((cube.periods - 1) // 13 + 1, 4)
+    return (cube.periods - 1) // 3 + 1
+
+
+def _nanmean(values, axis):
+    # 전부 NaN 인 칸의 RuntimeWarning 없이 NaN
+    count = np.sum(~np.isnan(values), axis=axis)
+    total = np.nansum(values, axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def yearly_summary(cube, matured, panels):
+    """구간 × 연도 평균 이탈률 + 전년 대비 증감(pp, 두 해 모두 집계 끝난 같은 기간끼리)"""
+    rates = _masked_rates(cube, matured)
+    index = [cube.panel_index(panel) for panel in panels]
+    table = {}
+    for y, year in enumerate(cube.years):
+        table[str(year)] = _nanmean(rates[y][:, index], axis=0)
+    for y in range(1, len(cube.years)):
+        both = matured[y][:, index] & matured[y - 1][:, index]
+        current = np.where(both, rates[y][:, index], np.nan)
+        previous = np.where(both, rates[y - 1][:, index], np.nan)
+        table[f"Δ{cube.years[y]}"] = _nanmean(current, axis=0) - _nanmean(previous, axis=0)
+
+    df = pd.DataFrame(table, index=panels)
+
+    # 신규 활성 수업 수는 기간 평균
+    counts = {str(year): np.nanmean(cube.counts[y][cube.present[y]]) for y, year in enumerate(cube.years)}
+    df.loc["신규 활성 수업 수(기간 평균)"] = pd.Series(counts)
+    return df
+
+
+def quarterly_summary(cube, matured, panels, years):
+    """구간 × (연도, 분기) 평균 이탈률 (집계 끝난 값만)"""
+    rates = _masked_rates(cube, matured)
+    quarter = _quarter(cube)
+    index = [cube.panel_index(panel) for panel in panels]
+    table = {}
+    for year in years:
+        y = cube.year_index(year)
+        for q in range(1, 5):
+            values = _nanmean(rates[y][quarter == q][:, index], axis=0)
+            if not np.isnan(values).all():
+                table[f"{year}Q{q}"] = values
+    return pd.DataFrame(table, index=panels)
+
+
+def recent_values(cube, matured, panels, periods):
+    """최근 periods 기간 값 (집계가 안 끝난 값은 빈 칸, 전부 빈 칸인 구간은 뺌)"""
+    timeline = np.flatnonzero(cube.present.ravel())[-periods:] if periods else []
+    index = [cube.panel_index(panel) for panel in panels]
+    table = {}
+    for flat in timeline:
+        y, p = np.unravel_index(flat, cube.present.shape)
+        label = f"{cube.years[y]}-{_period_label(cube, int(cube.periods[p]))}"
+        table[label] = np.where(matured[y, p, index], cube.rates[y, p, index], np.nan)
+    return pd.DataFrame(table, index=panels).dropna(how="all")
+
+
+def format_table(df, fmt="csv"):
+    """소수 첫째 자리 CSV / 마크다운 표 (빈 값은 빈 칸)"""
+    df = df.astype("float64")
+    if fmt == "markdown":
+        header = ["구간", *map(str, df.columns)]
+        lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        for name, row in zip(df.index, df.to_numpy()):
+            cells = ["" if np.isnan(value) else f"{value:.1f}" for value in row]
+            lines.append("| " + " | ".join([name, *cells]) + " |")
+        return "\n".join(lines)
+    return df.to_csv(index_label="구간", float_format="%.1f", na_rep="", lineterminator="\n").strip()
+
+
+def compact_data(cube, true_range, panels=None, budget=None, fmt=None):
+    """df.to_string() 대신 프롬프트에 넣을 요약 표 (토큰 예산 안에서 가장 자세한 단계)
+
+    - 연도별 평균 + 전년 대비 증감
+    - 최근 연도의 분기별 평균
+    - 최근 기간 값 (집계 중인 값은 빈 칸)
+    예산을 못 맞추면 가장 짧은 단계를 fits=False 로 반환
+    """
+    panels = list(panels or cube.panel_cos)
+    budget = budget or REPORT_TOKEN_BUDGET
+    fmt = fmt or REPORT_TABLE_FORMAT
+    matured = maturity_mask(cube, true_range)
+    yearly = format_table(yearly_summary(cube, matured, panels), fmt)
+    years = [int(year) for year in cube.years]
+
+    data = None
+    for quarter_years, recent_periods in COMPACTION_LEVELS:
+        kept = years if quarter_years is None else years[len(years) - quarter_years:]
+        sections = [f"[연도별 평균 이탈률(%) / Δ=전년 같은 기간 대비 증감(pp)]\n{yearly}"]
+        if kept:
+            quarterly = quarterly_summary(cube, matured, panels, kept)
+            sections.append(f"[분기별 평균 이탈률(%)]\n{format_table(quarterly, fmt)}")
+        if recent_periods:
+            recent = recent_values(cube, matured, panels, recent_periods)
+            unit = "주" if cube.week else "개월"
+            sections.append(
+                f"[최근 {recent_periods}{unit} 이탈률(%), 빈 칸=집계 중, 없는 구간은 모두 집계 중]\n"
+                f"{format_table(recent, fmt)}"
+            )
+        text = "\n\n".join(sections)
+        tokens = estimate_tokens(text)
+        data = PromptData(text, tokens, len(kept), recent_periods, tokens <= budget)
+        if data.fits:
+            break
+    return data
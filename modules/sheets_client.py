@@ -0,0 +1,310 @@
+import os
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import gspread
+import streamlit as st
+from gspread.utils import (
+    DateTimeOption, ValueRenderOption, absolute_range_name, rowcol_to_a1
+)
+from oauth2client.service_account import ServiceAccountCredentials
+
+SPREADSHEET_NAME = "🔥🔥🔥 경험그룹_KPI (수업 기준!!!!!) 🔥🔥🔥"
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+
+def load_credentials_info():
+    """서비스 계정 인증 정보 로드"""
+    # Streamlit secrets에서 인증 정보 가져오기
+    if "gcp_service_account" in st.secrets:
+        return dict(st.secrets["gcp_service_account"])
+
+    # 로컬에서 실행 시 - pj_appscript.json 파일 사용
+    with open('./pj_appscript.json', 'r') as f:
+        return json.load(f)
+
+
+class GoogleSheetsBackend:
+    """gspread 기반 실제 Google Sheets 백엔드"""
+
+    def __init__(self, spreadsheet_name=SPREADSHEET_NAME):
+        self.spreadsheet_name = spreadsheet_name
+        self._spreadsheet = None
+        self._lock = threading.Lock()
+
+    def spreadsheet(self):
+        # 인증/스프레드시트 열기는 백엔드당 한 번만
+        with self._lock:
+            if self._spreadsheet is None:
+                creds = ServiceAccountCredentials.from_json_keyfile_dict(
+                    load_credentials_info(), SCOPE
+                )
+                client = gspread.authorize(creds)
+                self._spreadsheet = client.open(self.spreadsheet_name)
+            return self._spreadsheet
+
+    def revision(self):
+        """스프레드시트 마지막 수정 시각 (Drive modifiedTime)"""
+        return self.spreadsheet().get_lastUpdateTime()
+
+    def fetch_values_batch(self, worksheets, start_rows=None, widths=None):
+        """여러 워크시트를 values:batchGet 한 번으로 받아 워크시트별 [헤더, *행] 값으로 반환
+
+        표시용 문자열 대신 원본 값(UNFORMATTED_VALUE)을 받으므로 퍼센트는 0.1234 같은 비율로 옴
+        start_rows : {워크시트: 시트 행 번호(헤더=1행)} 가 있으면 해당 행부터만 가져옴
+        widths : {워크시트: 컬럼 수} 가 있으면 데이터 행은 A열부터 그 컬럼까지만 가져옴
+        헤더 행은 컬럼 구성 변경을 알아챌 수 있도록 항상 전체를 가져옴
+        """
+        start_rows = start_rows or {}
+        widths = widths or {}
+
+        ranges = []
+        for worksheet in worksheets:
+            last_col = column_letter(widths[worksheet]) if worksheet in widths else "ZZZ"
+            ranges.append(absolute_range_name(worksheet, "1:1"))
+            ranges.append(absolute_range_name(worksheet, f"A{start_rows.get(worksheet, 2)}:{last_col}"))
+
+        response = self.spreadsheet().values_batch_get(ranges, params=VALUE_PARAMS)
+        value_ranges = iter(response["valueRanges"])
+
+        batch = {}
+        for worksheet in worksheets:
+            header = next(value_ranges).get("values", [])
+            batch[worksheet] = header[:1] + next(value_ranges).get("values", [])
+        return batch
+
+
+# 값은 서식 없이, 날짜는 시트 표시 문자열 그대로
+VALUE_PARAMS = {
+    "valueRenderOption": ValueRenderOption.unformatted,
+    "dateTimeRenderOption": DateTimeOption.formatted_string,
+}
+
+
+def column_letter(col):
+    """1부터 시작하는 컬럼 번호 → A1 컬럼 문자 (1 → A, 27 → AA)"""
+    return rowcol_to_a1(1, col)[:-1]
+
+
+class SheetsAPIError(Exception):
+    """가짜 백엔드가 내는 API 오류 (gspread APIError 처럼 code 속성을 가짐)"""
+
+    def __init__(self, code, message=""):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+
+
+class SheetsUnavailable(Exception):
+    """재시도를 다 해도 시트 요청이 실패함 (호출 쪽은 마지막 스냅샷으로 대체)"""
+
+
+class TokenBucket:
+    """프로세스 전체 시트 요청 쿼터 예산
+
+    capacity 개까지 몰아서 쓸 수 있고 초당 rate 개씩 다시 채워집니다.
+    (Sheets API 기본 읽기 쿼터: 사용자당 분당 60회)
+    """
+
+    def __init__(self, capacity=60, rate=1.0):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기하고, 기다린 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# 재시도할 응답 코드 (쿼터 초과 + 서버 오류)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimitedBackend:
+    """쿼터 예산 + 지수 백오프(jitter) 재시도를 거는 백엔드 래퍼
+
+    모든 요청은 공유 TokenBucket 에서 토큰을 받아야 나가고,
+    429/5xx 는 base_delay * 2^시도 범위 안에서 무작위로 쉰 뒤 다시 시도합니다.
+    재시도를 다 쓰면 SheetsUnavailable 을 냅니다.
+    """
+
+    def __init__(self, backend, bucket=None, max_retries=5, base_delay=1.0, max_delay=32.0, sleep=time.sleep):
+        self.backend = backend
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.retries = 0
+        self.throttled = 0
+
+    def _call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "code", None)
+                if status not in RETRY_STATUSES:
+                    raise
+                if status == 429:
+                    self.throttled += 1
+                if attempt == self.max_retries:
+                    raise SheetsUnavailable(f"시트 요청 실패 ({self.max_retries}회 재시도): {e}") from e
+                self.retries += 1
+                # full jitter: 0 ~ min(max_delay, base * 2^attempt)
+                self.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def revision(self):
+        return self._call(self.backend.revision)
+
+    def fetch_values_batch(self, worksheets, start_rows=None, widths=None):
+        return self._call(self.backend.fetch_values_batch, worksheets, start_rows=start_rows, widths=widths)
+
+
+class FakeSheetsBackend:
+    """오프라인 테스트용 가짜 시트 백엔드
+
+    워크시트 이름 → 시트 값([헤더, *행], UNFORMATTED_VALUE 형태) 을 메모리에 들고 있고,
+    update() 할 때마다 revision 이 바뀝니다.
+    latency 초만큼 fetch 를 지연시켜 동시 요청 상황을 재현할 수 있고,
+    inject_errors() 로 429/5xx 응답(쿼터 초과 등)을 흉내낼 수 있습니다.
+    """
+
+    def __init__(self, sheets=None, latency=0.0):
+        self.sheets = dict(sheets or {})
+        self.latency = latency
+        self.fetch_calls = 0
+        self.revision_calls = 0
+        self.fetched_rows = 0
+        self.fetched_cells = 0
+        self._errors = []
+        self._revision = 0
+        self._lock = threading.Lock()
+
+    def inject_errors(self, status, times=1):
+        """다음 times 번의 요청이 status 코드 오류로 실패하도록 설정"""
+        with self._lock:
+            self._errors.extend([status] * times)
+
+    def _raise_injected(self):
+        if self._errors:
+            raise SheetsAPIError(self._errors.pop(0), "injected by FakeSheetsBackend")
+
+    def revision(self):
+        with self._lock:
+            self.revision_calls += 1
+            self._raise_injected()
+            return str(self._revision)
+
+    def fetch_values_batch(self, worksheets, start_rows=None, widths=None):
+        # batch 요청도 왕복 1회로 집계
+        start_rows = start_rows or {}
+        widths = widths or {}
+        time.sleep(self.latency)
+        with self._lock:
+            self.fetch_calls += 1
+            self._raise_injected()
+            batch = {}
+            for worksheet in worksheets:
+                values = self.sheets[worksheet]
+                width = widths.get(worksheet)
+                # 시트 행 번호 → 값 인덱스 (헤더=0)
+                rows = values[start_rows.get(worksheet, 2) - 1:]
+                batch[worksheet] = [list(values[0])] + [list(row[:width]) for row in rows]
+                self.fetched_rows += len(rows)
+                self.fetched_cells += sum(len(row) for row in batch[worksheet])
+            return batch
+
+    def update(self, worksheet, values):
+        with self._lock:
+            self.sheets[worksheet] = [list(row) for row in values]
+            self._revision += 1
+
+    def append(self, worksheet, rows):
+        with self._lock:
+            self.sheets[worksheet] = self.sheets[worksheet] + [list(row) for row in rows]
+            self._revision += 1
+
+
+def make_fake_values(panels, week=True, start=datetime(2023, 1, 2), periods=None, seed=0, notes=True):
+    """가짜 시트 값 생성
+
+    헤더 + (시작일, 종료일, 신규 활성 수업 수, 패널별 비율) 행.
+    notes 가 True 면 대시보드가 쓰지 않는 메모 컬럼이 헤더 없이 오른쪽에 붙음
+    """
+    rng = np.random.default_rng(seed)
+    today = datetime.now()
+    values = [['시작일', '종료일', '신규 활성 수업 수'] + list(panels)]
+    current = start
+    while current < today and (periods is None or len(values) - 1 < periods):
+        if week:
+            end = current + timedelta(days=6)
+            next_start = current + timedelta(days=7)
+        else:
+            next_start = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+            end = next_start - timedelta(days=1)
+
+        row = [
+            current.strftime('%Y-%m-%d'),
+            end.strftime('%Y-%m-%d'),
+            int(rng.integers(200, 600)),
+        ]
+        row += [round(float(rng.uniform(0.01, 0.4)), 4) for _ in panels]
+        if notes:
+            row += ['', '확인 필요' if rng.random() < 0.1 else '']
+        values.append(row)
+        current = next_start
+    return values
+
+
+DASHBOARD_WORKSHEETS = {
+    "대시보드용_주별타겟신규수업": True,
+    "대시보드용_주별전체신규수업": True,
+    "대시보드용_월별타겟신규수업": False,
+    "대시보드용_월별전체신규수업": False,
+}
+
+
+def make_fake_backend():
+    """true_range.json 의 구간으로 채운 대시보드용 가짜 백엔드"""
+    with open("./true_range.json", "r", encoding="utf-8") as f:
+        panels = list(json.load(f))
+
+    sheets = {
+        worksheet: make_fake_values(panels, week=week, seed=i)
+        for i, (worksheet, week) in enumerate(DASHBOARD_WORKSHEETS.items())
+    }
+    return FakeSheetsBackend(sheets)
+
+
+@st.cache_resource
+def get_backend():
+    """프로세스 전체에서 공유하는 시트 백엔드
+
+    환경변수 DASHBOARD_SHEETS_BACKEND=fake 이면 오프라인 가짜 백엔드 사용.
+    어느 쪽이든 쿼터 예산/재시도 래퍼를 씌워서 반환
+    """
+    if os.environ.get("DASHBOARD_SHEETS_BACKEND") == "fake":
+        return RateLimitedBackend(make_fake_backend())
+    return RateLimitedBackend(GoogleSheetsBackend())
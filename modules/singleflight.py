@@ -0,0 +1,159 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 진행 중인 호출 하나로 합침
+
+    먼저 들어온 호출만 실제로 실행하고, 끝나기 전에 들어온 같은 키의 호출은
+    그 결과(또는 예외)를 그대로 받습니다. 끝난 뒤 들어온 호출은 새로 실행합니다.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_many(self, keys, fn, *args, **kwargs):
+        """키마다 single-flight: fn(맡은 키들) 은 {키: 결과} dict 를 반환해야 함
+
+        진행 중인 호출이 없는 키들만 묶어서 한 번 실행하고, 이미 다른 호출이 맡은 키는
+        그 호출이 끝나길 기다렸다가 결과를 받습니다. 키 묶음이 달라도 겹치는 키는 합쳐집니다.
+        """
+        with self._lock:
+            waits = {key: self._calls[key] for key in keys if key in self._calls}
+            own = [key for key in keys if key not in waits]
+            call = _Call() if own else None
+            for key in own:
+                self._calls[key] = call
+
+        results = {}
+        # 맡은 키를 먼저 실행하고 나서 기다려야 서로 기다리다 멈추는 일이 없음
+        if own:
+            try:
+                call.result = fn(own, *args, **kwargs)
+                results.update((key, call.result[key]) for key in own)
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in own:
+                        del self._calls[key]
+                call.done.set()
+
+        for key, other in waits.items():
+            other.done.wait()
+            if other.error is not None:
+                raise other.error
+            results[key] = other.result[key]
+        return results
+
+
+class _Stream:
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.result = None
+        self.error = None
+        self.changed = threading.Condition()
+
+
+class StreamFlight:
+    """같은 키로 동시에 들어온 스트리밍 호출을 진행 중인 스트림 하나로 합침
+
+    먼저 들어온 호출만 stream_fn() 조각을 받아 내보내고, 끝나기 전에 들어온 같은 키의 호출은
+    그때까지 나온 조각부터 같이 받습니다. 다 받으면 finish_fn(조각 리스트) 결과가
+    모든 호출의 반환값(StopIteration.value)이 됩니다. 끝난 뒤 들어온 호출은 새로 실행합니다.
+    """
+
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key, stream_fn, finish_fn):
+        with self._lock:
+            call = self._streams.get(key)
+            leader = call is None
+            if leader:
+                call = self._streams[key] = _Stream()
+
+        if not leader:
+            return (yield from self._follow(call))
+
+        try:
+            for chunk in stream_fn():
+                with call.changed:
+                    call.chunks.append(chunk)
+                    call.changed.notify_all()
+                yield chunk
+            call.result = finish_fn(call.chunks)
+            return call.result
+        except GeneratorExit:
+            # 받던 쪽이 중간에 그만두면 같이 받던 호출도 끝까지 받을 수 없음
+            call.error = RuntimeError("스트림이 중간에 중단되었습니다")
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._streams[key]
+            with call.changed:
+                call.finished = True
+                call.changed.notify_all()
+
+    def _follow(self, call):
+        sent = 0
+        while True:
+            with call.changed:
+                call.changed.wait_for(lambda: len(call.chunks) > sent or call.finished)
+                chunks, finished = call.chunks[sent:], call.finished
+            yield from chunks
+            sent += len(chunks)
+            if finished:
+                break
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def wait(self, key):
+        """진행 중인 스트림이 있으면 끝날 때까지 기다려 (True, 결과), 없으면 (False, None)"""
+        with self._lock:
+            call = self._streams.get(key)
+        if call is None:
+            return False, None
+        with call.changed:
+            call.changed.wait_for(lambda: call.finished)
+        if call.error is not None:
+            raise call.error
+        return True, call.result
@@ -0,0 +1,67 @@
+import os
+import json
+import threading
+from pathlib import Path
+from datetime import datetime
+
+import pandas as pd
+
+# 정제된 워크시트 프레임을 저장하는 로컬 스냅샷 폴더
+SNAPSHOT_DIR = Path(os.environ.get("DASHBOARD_SNAPSHOT_DIR", "./.snapshot_cache"))
+
+# 프레임 스키마가 바뀌면 올려서 예전 스냅샷을 버리도록
+SNAPSHOT_VERSION = 3
+
+
+def _paths(worksheet):
+    return SNAPSHOT_DIR / f"{worksheet}.parquet", SNAPSHOT_DIR / f"{worksheet}.json"
+
+
+def _tmp_path(path):
+    # 같은 워크시트를 동시에 저장해도(재검증 + prefetch + 새로고침) 임시 파일이 겹치지 않도록 쓰는 쪽마다 다른 이름
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def save_snapshot(worksheet, df, panel_cos, revision, extra=None):
+    """정제된 데이터프레임을 Parquet + 메타(json)로 저장
+
+    extra 는 메타에 함께 기록할 값 (증분 로딩용 원본 행 수 등)
+    """
+    data_path, meta_path = _paths(worksheet)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 임시 파일에 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록
+    tmp_data = _tmp_path(data_path)
+    df.to_parquet(tmp_data, index=False)
+    os.replace(tmp_data, data_path)
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "revision": revision,
+        "panel_cos": list(panel_cos),
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(df),
+        **(extra or {}),
+    }
+    tmp_meta = _tmp_path(meta_path)
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_meta, meta_path)
+
+
+def load_snapshot(worksheet):
+    """저장된 스냅샷 로드. 없거나 깨졌으면 None"""
+    data_path, meta_path = _paths(worksheet)
+    if not data_path.exists() or not meta_path.exists():
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+        df = pd.read_parquet(data_path)
+    except (OSError, ValueError):
+        return None
+
+    return df, meta["panel_cos"], meta
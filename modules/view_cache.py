@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import streamlit as st
+
+from modules.plotting import figure_nbytes
+
+
+class LRUCache:
+    """데이터셋 버전 토큰 + 작은 파라미터로 키를 잡는 LRU 캐시
+
+    st.cache_data 처럼 인자로 받은 데이터프레임을 매번 해시하지 않고,
+    (함수 이름, 버전 토큰, 연도, 구간 ...) 튜플만 비교합니다.
+    저장된 결과는 여러 세션이 같이 읽으므로 꺼낸 쪽에서 수정하면 안 됩니다.
+    max_bytes 와 sizeof(값 → 바이트) 를 주면 항목 수와 함께 메모리 예산으로도 밀어냅니다.
+    reserve() 로 잡아 둔 항목 수는 max_entries 에 더해집니다 (warm-up 이 채운 화면이 밀려나지 않도록).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None, sizeof=None):
+        self.base_entries = max_entries
+        self.max_entries = max_entries
+        self.reserved = {}
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, fn, *args, **kwargs):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # 만드는 동안에는 잠그지 않음 (같은 키를 동시에 만들면 나중 것이 덮어씀)
+        value = fn(*args, **kwargs)
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value  # 예산보다 큰 값은 저장하지 않음
+
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                old_key, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+        return value
+
+    def reserve(self, owner, entries):
+        """owner 몫으로 항목 수를 따로 잡아 둠 (같은 owner 로 다시 부르면 교체)"""
+        with self._lock:
+            self.reserved[owner] = entries
+            self.max_entries = self.base_entries + sum(self.reserved.values())
+
+    def entry_size(self, key):
+        """저장된 항목의 sizeof 크기 (없으면 None)"""
+        return self._sizes.get(_freeze(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats_text(self):
+        """사이드바 표시용 적중률"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        text = f"{len(self)}/{self.max_entries}개 · 적중 {self.hits}/{total} ({rate:.0f}%)"
+        if self.max_bytes is not None:
+            text += f" · {self.nbytes / 1024 ** 2:.1f}/{self.max_bytes / 1024 ** 2:.0f}MB"
+        return text
+
+
+# 그림 캐시 메모리 예산 (MB)
+FIGURE_CACHE_MB = float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", "64"))
+
+
+@st.cache_resource
+def get_view_cache():
+    """프로세스 전체에서 공유하는 화면 계산 캐시"""
+    return LRUCache()
+
+
+@st.cache_resource
+def get_figure_cache():
+    """만들어 둔 Plotly 그림을 JSON 크기 기준 메모리 예산 안에서 보관"""
+    return LRUCache(max_entries=1024, max_bytes=int(FIGURE_CACHE_MB * 1024 ** 2), sizeof=figure_nbytes)
+
+
+def stats_text():
+    """사이드바 표시용 캐시 상태"""
+    return (
+        f"🗂️ 계산 캐시: {get_view_cache().stats_text()}\n\n"
+        f"🖼️ 그림 캐시: {get_figure_cache().stats_text()}"
+    )
+
+
+def _freeze(value):
+    # 리스트 인자(여러 연도 등)도 키로 쓸 수 있게
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def memoize(key, fn, *args, **kwargs):
+    """key 가 같으면 fn 을 다시 부르지 않고 저장된 결과 반환
+
+    key 에는 반드시 데이터셋 버전 토큰을 넣어야 새 데이터가 들어왔을 때 다시 계산됩니다.
+    """
+    return get_view_cache().get_or_build(_freeze(key), fn, *args, **kwargs)
+
+
+def cached_figure(key, fn, *args, **kwargs):
+    """(데이터셋 버전, 주/월, 연도1, 연도2, 구간) 키로 그림 캐시
+
+    같은 화면을 다시 열면 그림을 새로 만들지 않고 브라우저 전송 비용만 듭니다.
+    """
+    return get_figure_cache().get_or_build(_freeze(key), fn, *args, **kwargs)
+
+
+def cached_view(fn):
+    """첫 인자가 ComparisonCube 인 계산 함수를 (함수, 큐브 버전, 나머지 인자) 로 캐시
+
+    버전이 없는 큐브(직접 만든 큐브 등)는 캐시하지 않고 그대로 계산합니다.
+    """
+    @wraps(fn)
+    def wrapper(cube, *args, **kwargs):
+        if cube.version is None:
+            return fn(cube, *args, **kwargs)
+        key = (fn.__qualname__, cube.version) + _freeze(args) + _freeze(tuple(sorted(kwargs.items())))
+        return memoize(key, fn, cube, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,60 @@
+from typing import NamedTuple
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from modules.preprocessing import cleansing_df
+from modules.metric import cal_rate, cal_count
+from modules.plotting import viz_rate, comparison_table, figure_nbytes
+from modules.view_cache import cached_figure, get_figure_cache, memoize
+
+
+class ComparisonView(NamedTuple):
+    """페이지 한 화면 (지난년도 vs 이번년도, 구간 하나) 에 필요한 결과"""
+    df_year1: pd.DataFrame
+    df_year2: pd.DataFrame
+    df_diff_rate: pd.DataFrame
+    df_diff_count: pd.DataFrame
+    fig: go.Figure
+    fig_bytes: int
+    table: pd.DataFrame
+    table_config: dict
+
+
+def view_cache_entries(combinations):
+    """(연도1, 연도2, 구간) 조합들을 build_view 로 만들 때 계산 캐시에 생기는 항목 수
+
+    연도 쌍마다 cleansing_df / cal_count, 조합마다 cal_rate / comparison_table
+    """
+    pairs = {(year1, year2) for year1, year2, _ in combinations}
+    return 2 * len(pairs) + 2 * len(combinations)
+
+
+def build_view(dataset, year1, year2, selected_panel, true_range):
+    """비교 데이터 → 그림 → 테이블
+
+    단계마다 데이터셋 버전 키로 캐시되므로 warm-up 이 미리 불러 두면 페이지는 꺼내기만 합니다.
+    """
+    cube = dataset.cube
+    granularity = "week" if cube.week else "month"
+
+    df_year1, df_year2 = cleansing_df(cube, year1, year2)
+    df_diff_rate = cal_rate(cube, selected_panel, year1, year2)
+    df_diff_count = cal_count(cube, year1, year2)
+
+    fig_key = (dataset.version, granularity, year1, year2, selected_panel)
+    fig = cached_figure(
+        fig_key, viz_rate,
+        df_year1, df_year2, selected_panel, df_diff_count, df_diff_rate, year1, year2, true_range,
+        week=cube.week
+    )
+    # 전송 크기는 그림 캐시가 저장할 때 잰 값을 재사용 (예산 초과로 저장 안 됐으면 다시 잼)
+    fig_bytes = get_figure_cache().entry_size(fig_key) or figure_nbytes(fig)
+
+    table, table_config = memoize(
+        (dataset.version, "comparison_table", year1, year2, selected_panel), comparison_table,
+        df_year1, df_year2, df_diff_rate, year1, year2, selected_panel, week=cube.week
+    )
+    return ComparisonView(
+        df_year1, df_year2, df_diff_rate, df_diff_count, fig, fig_bytes, table, table_config
+    )
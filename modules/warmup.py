@@ -0,0 +1,119 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import streamlit as st
+# plotly 는 그림을 JSON 으로 바꿀 때 sys.modules 에서 PIL.Image 를 찾기만 하므로,
+# 여러 스레드가 처음 쓰는 순간 한 스레드가 import 중이면 초기화가 덜 된 모듈을 보고 실패함 → 미리 불러 둠
+import PIL.Image  # noqa: F401
+
+from modules.dataset_store import get_dataset_store
+from modules.views import build_view, view_cache_entries
+from modules.view_cache import get_view_cache
+from modules.page_registry import true_range_for
+
+logger = logging.getLogger(__name__)
+
+# warm-up 스레드 수 (0 이면 warm-up 끔)
+WARMUP_WORKERS = int(os.environ.get("DASHBOARD_WARMUP_WORKERS", "4"))
+
+
+class WarmupReport(NamedTuple):
+    worksheet: str
+    version: str
+    views: int
+    failed: int
+    seconds: float
+    workers: int
+    finished_at: datetime
+
+
+class Warmer:
+    """새 데이터셋 버전이 게시되면 모든 (지난년도 × 구간) 화면을 미리 만들어 캐시에 채움
+
+    그림 생성은 대부분 파이썬 코드라 스레드 이득이 크지 않지만,
+    캐시가 프로세스 메모리에 있으므로 프로세스 풀 대신 스레드 풀을 씁니다.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.reports = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="view-warmup")
+
+    def combinations(self, dataset):
+        """페이지에서 고를 수 있는 (지난년도, 이번년도, 구간) 조합"""
+        current_year = datetime.now().year
+        if not dataset.cube.has_year(current_year):
+            return []
+        previous_years = [int(year) for year in dataset.cube.years if year < current_year]
+        return [
+            (year1, current_year, panel)
+            for year1 in previous_years
+            for panel in dataset.panel_cos
+        ]
+
+    def warm(self, dataset):
+        started = time.perf_counter()
+        # 페이지와 같은 성숙 기간 파일로 (그래야 같은 캐시 키를 채움)
+        true_range = true_range_for(dataset)
+        combinations = self.combinations(dataset)
+        # 워크시트마다 채울 화면만큼 계산 캐시 자리를 따로 잡아 둠 (warm-up 끼리 밀어내지 않도록)
+        get_view_cache().reserve(dataset.worksheet, view_cache_entries(combinations))
+
+        futures = [
+            self._executor.submit(build_view, dataset, year1, year2, panel, true_range)
+            for year1, year2, panel in combinations
+        ]
+
+        failed = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                logger.warning("%s 화면 생성 실패: %s", dataset.worksheet, e)
+
+        report = WarmupReport(
+            dataset.worksheet, dataset.version, len(futures), failed,
+            time.perf_counter() - started, self.workers, datetime.now()
+        )
+        self.reports[dataset.worksheet] = report
+        logger.info(
+            "%s: %d개 화면 %.2f초 (스레드 %d개)",
+            report.worksheet, report.views, report.seconds, report.workers
+        )
+        return report
+
+    def on_publish(self, dataset):
+        # 게시한 쪽(사용자 rerun, 백그라운드 갱신)을 기다리게 하지 않도록 별도 스레드에서
+        threading.Thread(target=self.warm, args=(dataset,), name="view-warmup-run", daemon=True).start()
+
+    def status_text(self):
+        """사이드바 표시용 warm-up 결과"""
+        if not self.reports:
+            return "🔥 화면 미리 만들기: 대기 중"
+        views = sum(report.views for report in self.reports.values())
+        # 워크시트별 warm-up 은 같은 풀에서 겹쳐 돌기 때문에 합이 아니라 가장 긴 시간
+        seconds = max(report.seconds for report in self.reports.values())
+        return f"🔥 화면 미리 만들기: {views}개 · 최대 {seconds:.2f}초 (스레드 {self.workers}개)"
+
+
+@st.cache_resource
+def start_warmup():
+    """새 버전이 게시될 때마다 warm-up 하도록 저장소에 등록 (프로세스당 한 번)
+
+    DASHBOARD_WARMUP_WORKERS=0 이면 None
+    """
+    if WARMUP_WORKERS <= 0:
+        return None
+    warmer = Warmer(WARMUP_WORKERS)
+    store = get_dataset_store()
+    store.subscribe(warmer.on_publish)
+    # 등록 전에 이미 게시된 버전도 채움
+    for dataset in store.datasets():
+        warmer.on_publish(dataset)
+    return warmer
@@ -0,0 +1,59 @@
+import streamlit as st
+from datetime import datetime
+
+from modules.page_engine import load_page, render_sidebar
+from modules.view_cache import cached_figure, get_figure_cache
+from modules.metric import cal_all_panels
+from modules.plotting import viz_all_panels, figure_nbytes
+from modules.page_registry import PAGES
+
+st.set_page_config(
+    page_title="전체 구간 비교 대시보드",
+    page_icon="📊",
+    layout="wide"
+)
+
+# 데이터 이름 → 페이지 설정 (분석 페이지와 같은 워크시트/세션 키를 씀)
+DATA_OPTIONS = {config.name: config for config in PAGES.values()}
+
+
+# 연도 선택 + 그림은 독립된 조각(fragment): 연도를 바꾸면 이 함수만 다시 실행됨
+@st.fragment
+def all_panels_section(config, dataset, true_range):
+    cube = dataset.cube
+    # 연도 선택 (이번년도는 고정)
+    current_year = datetime.now().year
+    previous_years = [int(year) for year in cube.years if year < current_year]
+    if not cube.has_year(current_year) or not previous_years:
+        st.info(f"비교할 연도 데이터가 없습니다. (이번년도 {current_year}년과 지난년도가 모두 있어야 합니다)")
+        return
+
+    st.subheader("🎯 비교분석할 연도 선택")
+    years = st.multiselect(
+        f"지난년도 ({current_year}년과 비교)",
+        previous_years,
+        default=previous_years[-1:],
+        key="all_panels_years"
+    )
+
+    # 모든 구간을 같은 기간 키로 한 번에 꺼내 한 그림으로 (구간을 하나씩 누를 필요 없음)
+    periods, rates = cal_all_panels(cube, years, current_year)
+    fig_key = (dataset.version, "all_panels", years, current_year)
+    fig = cached_figure(
+        fig_key, viz_all_panels,
+        periods, rates, dataset.panel_cos, years, current_year, true_range, week=config.week
+    )
+    st.plotly_chart(fig)
+    fig_bytes = get_figure_cache().entry_size(fig_key) or figure_nbytes(fig)
+    st.caption(f"구간 {len(dataset.panel_cos)}개 · 그림 전송 크기: {fig_bytes / 1024:.1f}KB")
+
+
+with st.sidebar:
+    data_name = st.radio("데이터", list(DATA_OPTIONS), key="all_panels_data")
+config = DATA_OPTIONS[data_name]
+
+warmer, prefetcher, dataset, true_range = load_page(config)
+render_sidebar(config, prefetcher, warmer)
+st.title(f"📊 {data_name} 전체 구간 이탈률 비교")
+
+all_panels_section(config, dataset, true_range)
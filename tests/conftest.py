@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# 가짜 시트에 쓰는 짧은 구간 목록
+PANELS = ["1개월 이탈", "2개월 이탈", "단골 전환 4개월 이상"]
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    # 테스트 스냅샷이 실제 스냅샷 폴더에 섞이지 않도록
+    import modules.snapshot
+    monkeypatch.setattr(modules.snapshot, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    return tmp_path / "snapshots"
+
+
+@pytest.fixture(autouse=True)
+def report_cache_dir(tmp_path, monkeypatch):
+    # 보고서 캐시도 테스트마다 빈 폴더에서 시작
+    import modules.report_cache
+    monkeypatch.setattr(modules.report_cache, "REPORT_CACHE_DIR", tmp_path / "reports")
+    return tmp_path / "reports"
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    """가짜 시트의 주별 타겟 워크시트를 게시한 데이터셋 (true_range.json 을 저장소 루트에서 읽음)"""
+    from modules.data_loader import clean_sheet_values
+    from modules.dataset_store import DatasetStore
+    from modules.sheets_client import make_fake_backend
+
+    monkeypatch.chdir(ROOT)
+    worksheet = "대시보드용_주별타겟신규수업"
+    df, panel_cos = clean_sheet_values(make_fake_backend().sheets[worksheet], True)
+    return DatasetStore().publish(worksheet, df, panel_cos, "test")
+
+
+@pytest.fixture
+def make_backend():
+    """fake_backend(latency=0) → 대시보드 워크시트 4개를 짧은 구간 목록으로 채운 가짜 백엔드"""
+    from modules.sheets_client import DASHBOARD_WORKSHEETS, FakeSheetsBackend, make_fake_values
+
+    def fake_backend(latency=0.0):
+        sheets = {
+            worksheet: make_fake_values(PANELS, week=week, seed=i)
+            for i, (worksheet, week) in enumerate(DASHBOARD_WORKSHEETS.items())
+        }
+        return FakeSheetsBackend(sheets, latency=latency)
+    return fake_backend
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """data_loader 가 쓰는 공유 저장소를 테스트마다 빈 저장소로 바꿈"""
+    import modules.data_loader
+    from modules.dataset_store import DatasetStore
+
+    store = DatasetStore()
+    monkeypatch.setattr(modules.data_loader, "get_dataset_store", lambda: store)
+    return store
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from modules.cube import ComparisonCube
+from modules.data_loader import clean_sheet_values
+from modules.sheets_client import make_fake_values
+
+PANELS = ["1개월 이탈", "2개월 이탈"]
+
+
+def test_year_index_rejects_missing_years():
+    # 2021, 2023 만 있는 시트 (중간 연도 2022 없음)
+    values = make_fake_values(PANELS, start=datetime(2021, 1, 4), periods=52)
+    values += make_fake_values(PANELS, start=datetime(2023, 1, 2), periods=10)[1:]
+    cube = ComparisonCube(*clean_sheet_values(values, True))
+
+    assert list(cube.years) == [2021, 2023]
+    assert cube.year_index(2023) == 1
+    assert cube.has_year(2021) and not cube.has_year(2022)
+    for year in (2020, 2022, 2024):
+        with pytest.raises(KeyError, match=f"{year}년"):
+            cube.year_index(year)
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import modules.data_loader
+from modules.data_loader import (
+    _full_reload_due, _revalidate, _tail_start, clean_sheet_values, get_dataset, refresh_worksheets,
+)
+from modules.sheets_client import FakeSheetsBackend, make_fake_values
+from modules.snapshot import load_snapshot, save_snapshot
+from conftest import PANELS
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+def save_current_snapshot(backend, week=True):
+    # 가짜 시트의 현재 값과 revision 으로 스냅샷을 미리 저장
+    df, panel_cos = clean_sheet_values(backend.sheets[WORKSHEET], week)
+    save_snapshot(WORKSHEET, df, panel_cos, backend.revision())
+    return df
+
+
+def test_get_dataset_serves_snapshot_without_fetch(make_backend, store, monkeypatch):
+    backend = make_backend()
+    df = save_current_snapshot(backend)
+    started = []
+    monkeypatch.setattr(modules.data_loader, "get_backend", lambda: backend)
+    monkeypatch.setattr(modules.data_loader, "_start_revalidation", lambda *args: started.append(args))
+
+    dataset = get_dataset(WORKSHEET, True)
+
+    assert backend.fetch_calls == 0
+    assert dataset is store.latest(WORKSHEET) and dataset.df.equals(df)
+    # 스냅샷 revision 으로 백그라운드 재검증을 건 상태
+    assert [(worksheets[WORKSHEET], revision) for _, worksheets, revision in started] == [(True, "0")]
+
+
+def test_get_dataset_revalidates_after_ttl(make_backend, store, monkeypatch):
+    backend = make_backend()
+    save_current_snapshot(backend)
+    started = []
+    monkeypatch.setattr(modules.data_loader, "get_backend", lambda: backend)
+    monkeypatch.setattr(modules.data_loader, "_start_revalidation", lambda *args: started.append(args))
+
+    first = get_dataset(WORKSHEET, True)
+    assert get_dataset(WORKSHEET, True, ttl=300) is first and len(started) == 1
+    assert get_dataset(WORKSHEET, True, ttl=-1) is first and len(started) == 2
+
+
+def test_revalidate_publishes_changed_sheet(make_backend, store):
+    backend = make_backend()
+    save_current_snapshot(backend)
+    backend.append(WORKSHEET, [["2099-01-05", "2099-01-11", 100, 0.1, 0.2, 0.3]])
+
+    _revalidate(backend, {WORKSHEET: True}, "0")
+
+    assert backend.fetch_calls == 1
+    assert store.latest(WORKSHEET).revision == "1"
+
+
+def test_revalidate_unchanged_sheet_only_marks_checked(make_backend, store):
+    backend = make_backend()
+    save_current_snapshot(backend)
+
+    _revalidate(backend, {WORKSHEET: True}, backend.revision())
+
+    assert backend.fetch_calls == 0
+    assert store.latest(WORKSHEET) is None and store.checked_at(WORKSHEET) > 0
+
+
+def test_snapshot_write_failure_still_publishes(make_backend, store, snapshot_dir):
+    # 스냅샷 폴더 자리에 파일이 있어서 mkdir 이 OSError 를 냄
+    snapshot_dir.parent.mkdir(parents=True, exist_ok=True)
+    snapshot_dir.write_text("")
+    backend = make_backend()
+
+    result = refresh_worksheets(backend, {WORKSHEET: True})
+
+    assert result[WORKSHEET] is store.latest(WORKSHEET)
+    assert load_snapshot(WORKSHEET) is None
+
+
+def make_tail_backend(periods=40, total=60):
+    """periods 행만 올라간 주별 시트 + 이어서 붙일 나머지 행 (모두 오늘 이전 날짜)"""
+    values = make_fake_values(PANELS, week=True, periods=total)
+    return FakeSheetsBackend({WORKSHEET: values[:periods + 1]}), values[periods + 1:]
+
+
+def assert_matches_full_load(backend, result):
+    expected, panel_cos = clean_sheet_values(backend.sheets[WORKSHEET], True)
+    assert result[WORKSHEET].panel_cos == panel_cos
+    pd.testing.assert_frame_equal(result[WORKSHEET].df.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def refresh_tail(backend):
+    return refresh_worksheets(backend, {WORKSHEET: True}, incremental=True, recent_window=4)
+
+
+def test_tail_merge_appended_rows(store):
+    backend, rest = make_tail_backend()
+    refresh_tail(backend)
+    backend.append(WORKSHEET, rest[:3])
+    fetched = backend.fetched_rows
+
+    result = refresh_tail(backend)
+
+    # 겹치는 최근 4행 + 새 3행만 받음
+    assert backend.fetched_rows - fetched == 7
+    assert_matches_full_load(backend, result)
+
+
+def test_tail_merge_edited_recent_row(store):
+    backend, _ = make_tail_backend()
+    refresh_tail(backend)
+    values = [list(row) for row in backend.sheets[WORKSHEET]]
+    values[-2][2] += 1
+    values[-1][3] = ''
+    backend.update(WORKSHEET, values)
+    fetched = backend.fetched_rows
+
+    result = refresh_tail(backend)
+
+    assert backend.fetched_rows - fetched == 4
+    assert_matches_full_load(backend, result)
+
+
+def test_deleted_earlier_row_forces_full_reload(store):
+    backend, rest = make_tail_backend()
+    refresh_tail(backend)
+    values = backend.sheets[WORKSHEET]
+    backend.update(WORKSHEET, values[:5] + values[6:] + rest[:1])
+    fetch_calls = backend.fetch_calls
+
+    result = refresh_tail(backend)
+
+    # 겹치는 행의 시작일이 어긋나서 꼬리 요청 뒤에 전체 요청을 한 번 더 보냄
+    assert backend.fetch_calls - fetch_calls == 2
+    assert load_snapshot(WORKSHEET)[2]["incremental_refreshes"] == 0
+    assert_matches_full_load(backend, result)
+
+
+def test_header_width_change_forces_full_reload(store):
+    backend, _ = make_tail_backend()
+    refresh_tail(backend)
+    values = [list(row) for row in backend.sheets[WORKSHEET]]
+    # 메모 컬럼 자리에 새 구간 컬럼이 생김
+    values[0] = values[0] + ["3개월 이탈"]
+    for row in values[1:]:
+        row[len(values[0]) - 1] = 0.05
+    backend.update(WORKSHEET, values)
+    fetch_calls = backend.fetch_calls
+
+    result = refresh_tail(backend)
+
+    assert backend.fetch_calls - fetch_calls == 2
+    assert result[WORKSHEET].panel_cos == PANELS + ["3개월 이탈"]
+    assert_matches_full_load(backend, result)
+
+
+def test_full_reload_every_n_refreshes(store, monkeypatch):
+    monkeypatch.setattr(modules.data_loader, "FULL_RELOAD_EVERY", 2)
+    backend, rest = make_tail_backend()
+    refresh_tail(backend)
+
+    counts = []
+    for row in rest[:3]:
+        backend.append(WORKSHEET, [row])
+        result = refresh_tail(backend)
+        counts.append(load_snapshot(WORKSHEET)[2]["incremental_refreshes"])
+        assert_matches_full_load(backend, result)
+
+    # 증분 2번 뒤에는 전체를 다시 받고 횟수를 초기화
+    assert counts == [1, 2, 0]
+
+
+def test_full_reload_due_after_hours():
+    now = datetime(2024, 1, 1, 12)
+    meta = {"incremental_refreshes": 0, "full_at": (now - timedelta(hours=1)).isoformat()}
+    assert not _full_reload_due(meta, now)
+    assert _full_reload_due({**meta, "full_at": (now - timedelta(hours=25)).isoformat()}, now)
+    assert _full_reload_due({"incremental_refreshes": 0}, now)
+
+
+def test_tail_start_keeps_recent_window():
+    df = pd.DataFrame({"날짜": range(10)})
+    assert _tail_start({"raw_rows": 10, "last_start": "2024-01-01"}, df, 4) == 6
+    # 오늘 이후라 프레임에서 빠진 행이 있으면 프레임 끝부터 다시 받음
+    assert _tail_start({"raw_rows": 12, "last_start": "2024-01-01"}, df, 1) == 10
+    assert _tail_start({}, df, 4) is None
+
+
+def test_clean_drops_unfilled_future_rows():
+    # 다음 주 행이 날짜만 먼저 들어가고 나머지 칸은 비어 있는 경우
+    values = make_fake_values(PANELS, week=True, periods=10)
+    expected, _ = clean_sheet_values(values, True)
+    future = ["2099-01-05", "2099-01-11", ""] + [""] * len(PANELS)
+
+    df, _ = clean_sheet_values(values + [future], True)
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert df['신규 활성 수업 수'].dtype == 'int32'
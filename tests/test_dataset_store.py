@@ -0,0 +1,43 @@
+from modules.data_loader import clean_sheet_values, refresh_worksheets
+from modules.dataset_store import DatasetStore, get_dataset_store
+from modules.sheets_client import DASHBOARD_WORKSHEETS
+from modules.snapshot import load_snapshot, save_snapshot
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+def test_same_content_reuses_version_across_revisions(make_backend):
+    backend = make_backend(latency=0)
+    df, panel_cos = clean_sheet_values(backend.sheets[WORKSHEET], True)
+    store = DatasetStore()
+    published = []
+    store.subscribe(published.append)
+
+    first = store.publish(WORKSHEET, df, panel_cos, "1")
+    again = store.publish(WORKSHEET, df.copy(), list(panel_cos), "2")
+
+    assert again.version == first.version and again.cube is first.cube
+    assert again.revision == "2" and store.latest(WORKSHEET).revision == "2"
+    assert published == [first]
+
+
+def test_unrelated_sheet_edit_keeps_versions(make_backend):
+    # 다른 탭을 고친 것처럼 값은 그대로 두고 revision 만 올림
+    backend = make_backend(latency=0)
+    before = refresh_worksheets(backend, dict(DASHBOARD_WORKSHEETS))
+    backend.update(WORKSHEET, backend.sheets[WORKSHEET])
+    after = refresh_worksheets(backend, dict(DASHBOARD_WORKSHEETS))
+
+    for worksheet in DASHBOARD_WORKSHEETS:
+        assert after[worksheet].version == before[worksheet].version
+        assert after[worksheet] is get_dataset_store().latest(worksheet)
+
+
+def test_snapshot_round_trip_keeps_version(make_backend):
+    backend = make_backend(latency=0)
+    df, panel_cos = clean_sheet_values(backend.sheets[WORKSHEET], True)
+    save_snapshot(WORKSHEET, df, panel_cos, "1")
+    loaded, loaded_panels, _ = load_snapshot(WORKSHEET)
+
+    assert DatasetStore().publish(WORKSHEET, loaded, loaded_panels, "1").version == \
+        DatasetStore().publish(WORKSHEET, df, panel_cos, "1").version
@@ -0,0 +1,109 @@
+import threading
+
+from modules.dataset_store import DatasetStore
+from modules.genai import FakeGenAIClient, ReportStream, cached_report, get_report
+from modules.report_summary import estimate_frame_tokens, estimate_tokens
+
+
+def test_get_report_reuses_saved_report(dataset):
+    client = FakeGenAIClient()
+    report, hit = get_report(dataset, client=client)
+    assert not hit and client.calls == 1
+
+    again, hit = get_report(dataset, client=client)
+    assert hit and again == report
+    assert client.calls == 1
+
+
+def test_regenerate_overwrites_saved_report(dataset):
+    client = FakeGenAIClient()
+    first, _ = get_report(dataset, client=client)
+
+    second, hit = get_report(dataset, regenerate=True, client=client)
+    assert not hit and client.calls == 2
+    assert "호출 번호 2" in second.text and second.text != first.text
+    assert cached_report(dataset) == second
+
+
+def test_concurrent_requests_share_one_generation(dataset):
+    client = FakeGenAIClient(delay=0.3)
+    barrier = threading.Barrier(5)
+    reports = []
+
+    def request():
+        barrier.wait()
+        reports.append(get_report(dataset, client=client)[0])
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert len({report.text for report in reports}) == 1
+
+
+def test_report_modes_are_cached_separately(dataset):
+    client = FakeGenAIClient()
+    full, _ = get_report(dataset, client=client)
+    sections, hit = get_report(dataset, client=client, mode="sections")
+    assert not hit and sections.prompt_version != full.prompt_version
+
+    calls = client.calls
+    assert get_report(dataset, client=client, mode="sections") == (sections, True)
+    assert client.calls == calls
+
+
+def test_concurrent_streams_share_one_generation(dataset):
+    client = FakeGenAIClient(delay=0.4, chunks=8)
+    barrier = threading.Barrier(10)
+    streams = [ReportStream(dataset, client) for _ in range(10)]
+    texts = [None] * len(streams)
+
+    def consume(i):
+        barrier.wait()
+        texts[i] = "".join(streams[i])
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(len(streams))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert len(set(texts)) == 1
+    assert all(stream.report.text == texts[0] for stream in streams)
+    assert cached_report(dataset).text == texts[0]
+
+
+def test_get_report_waits_for_in_flight_stream(dataset):
+    client = FakeGenAIClient(delay=0.4, chunks=8)
+    stream = iter(ReportStream(dataset, client))
+    first = next(stream)
+
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(report=get_report(dataset, client=client)))
+    waiter.start()
+    text = first + "".join(stream)
+    waiter.join()
+
+    assert client.calls == 1
+    assert result["report"][0].text == text
+
+
+def test_revision_only_change_keeps_report_cache(dataset):
+    # 스프레드시트의 다른 탭만 바뀌어 revision 이 달라져도 같은 데이터면 같은 보고서
+    client = FakeGenAIClient()
+    report, _ = get_report(dataset, client=client)
+
+    republished = DatasetStore().publish(dataset.worksheet, dataset.df.copy(), dataset.panel_cos, "other-tab-edit")
+    assert republished.version == dataset.version
+    assert get_report(republished, client=client) == (report, True)
+    assert client.calls == 1
+
+
+def test_full_table_estimate_is_close(dataset):
+    # 캡션의 "전체 표" 크기는 to_string() 없이 추정하되 실제 값과 크게 다르지 않아야 함
+    actual = estimate_tokens(dataset.df.to_string())
+    assert abs(estimate_frame_tokens(dataset.df) - actual) < actual * 0.1
@@ -0,0 +1,84 @@
+import time
+import threading
+
+from modules.data_loader import refresh_worksheets_once
+from modules.sheets_client import DASHBOARD_WORKSHEETS
+from modules.singleflight import SingleFlight
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+def run_together(targets):
+    """targets 를 동시에 시작하고 각 결과를 순서대로 반환"""
+    barrier = threading.Barrier(len(targets))
+    results = [None] * len(targets)
+
+    def run(i, target):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i, target)) for i, target in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_refreshes_share_one_fetch(make_backend):
+    backend = make_backend(latency=0.3)
+    results = run_together([
+        lambda: refresh_worksheets_once(backend, {WORKSHEET: True}, incremental=True)
+        for _ in range(8)
+    ])
+
+    assert backend.fetch_calls == 1
+    assert len({result[WORKSHEET].version for result in results}) == 1
+
+
+def test_overlapping_worksheet_sets_are_merged(make_backend):
+    backend = make_backend(latency=0.3)
+    started = threading.Event()
+
+    def sync_all():
+        started.set()
+        return refresh_worksheets_once(backend, dict(DASHBOARD_WORKSHEETS))
+
+    def refresh_one():
+        # 전체 갱신이 워크시트를 맡은 뒤에 들어오도록 (fetch 지연 0.3초 안쪽)
+        started.wait()
+        time.sleep(0.1)
+        return refresh_worksheets_once(backend, {WORKSHEET: True}, incremental=True)
+
+    everything, one = run_together([sync_all, refresh_one])
+
+    assert backend.fetch_calls == 1
+    assert one[WORKSHEET].version == everything[WORKSHEET].version
+
+
+def test_do_many_runs_only_uncovered_keys():
+    flight = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(keys):
+        calls.append(sorted(keys))
+        if "a" in keys:
+            entered.set()
+            release.wait()
+        return {key: key.upper() for key in keys}
+
+    leader = threading.Thread(target=lambda: flight.do_many(["a", "b"], fetch))
+    leader.start()
+    entered.wait()
+
+    results = {}
+    follower = threading.Thread(target=lambda: results.update(flight.do_many(["b", "c"], fetch)))
+    follower.start()
+    follower.join(0.1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert calls == [["a", "b"], ["c"]]
+    assert results == {"b": "B", "c": "C"}
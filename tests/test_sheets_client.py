@@ -0,0 +1,69 @@
+import pytest
+import streamlit as st
+
+import modules.data_loader
+from modules.data_loader import get_session_dataset, refresh_session_dataset
+from modules.sheets_client import RateLimitedBackend, SheetsAPIError, SheetsUnavailable, TokenBucket
+
+WORKSHEET = "대시보드용_주별타겟신규수업"
+
+
+def limited(backend, max_retries=3):
+    """쉬지 않는 sleep 과 넉넉한 토큰으로 감싼 백엔드 + 요청된 대기 시간 목록"""
+    delays = []
+    wrapped = RateLimitedBackend(
+        backend, bucket=TokenBucket(capacity=100, rate=100),
+        max_retries=max_retries, base_delay=1.0, max_delay=4.0, sleep=delays.append,
+    )
+    return wrapped, delays
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_errors_are_retried(make_backend, status):
+    backend = make_backend()
+    backend.inject_errors(status, times=2)
+    wrapped, delays = limited(backend)
+
+    batch = wrapped.fetch_values_batch([WORKSHEET])
+
+    assert batch[WORKSHEET] == backend.sheets[WORKSHEET]
+    assert backend.fetch_calls == 3 and wrapped.retries == 2
+    assert wrapped.throttled == (2 if status == 429 else 0)
+    # full jitter: 시도마다 0 ~ base * 2^시도 안에서 쉼
+    assert len(delays) == 2 and all(0 <= delay <= 2 ** i for i, delay in enumerate(delays))
+
+
+def test_gives_up_after_max_retries(make_backend):
+    backend = make_backend()
+    backend.inject_errors(429, times=10)
+    wrapped, delays = limited(backend, max_retries=3)
+
+    with pytest.raises(SheetsUnavailable):
+        wrapped.revision()
+    assert backend.revision_calls == 4 and len(delays) == 3
+
+
+def test_client_errors_are_not_retried(make_backend):
+    backend = make_backend()
+    backend.inject_errors(403)
+    wrapped, delays = limited(backend)
+
+    with pytest.raises(SheetsAPIError) as e:
+        wrapped.fetch_values_batch([WORKSHEET])
+    assert e.value.code == 403
+    assert backend.fetch_calls == 1 and delays == []
+
+
+def test_refresh_keeps_last_good_version(make_backend, store, monkeypatch):
+    backend = make_backend()
+    wrapped, _ = limited(backend, max_retries=2)
+    monkeypatch.setattr(modules.data_loader, "get_backend", lambda: wrapped)
+    session_key = "test_refresh_keeps_last_good_version"
+
+    before = get_session_dataset(WORKSHEET, True, session_key)
+    backend.append(WORKSHEET, [["2099-01-05", "2099-01-11", 100, 0.1, 0.2, 0.3]])
+    backend.inject_errors(429, times=10)
+
+    assert refresh_session_dataset(WORKSHEET, True, session_key) is False
+    assert st.session_state[session_key] == before.version
+    assert get_session_dataset(WORKSHEET, True, session_key) is before
@@ -0,0 +1,14 @@
+from modules.view_cache import LRUCache
+
+
+def test_reserved_entries_are_not_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.reserve("warmup", 3)
+    for i in range(5):
+        cache.get_or_build(i, lambda i=i: i)
+    assert len(cache) == 5 and cache.evictions == 0
+
+    # 같은 owner 로 다시 잡으면 교체 (더해지지 않음)
+    cache.reserve("warmup", 1)
+    cache.get_or_build(5, lambda: 5)
+    assert len(cache) == 3 and cache.evictions == 3